@@ -0,0 +1,165 @@
+"""JWT-аутентификация без запроса пользователя к БД.
+
+Имя, роль и признак персонала записываются в токен при выдаче, поэтому
+проверка прав обходится без SELECT. Остальные поля пользователя отложены и
+загружаются одним запросом при первом обращении. Смена роли увеличивает
+`User.token_version`, и токены со старой версией перестают приниматься.
+Текущая версия хранится в кэше `AUTH_TOKEN_VERSION_TIMEOUT` секунд: процесс,
+не разделяющий кэш с изменившим роль, узнает о ней не позже этого срока.
+Включается настройкой `AUTH_TOKEN_CLAIMS`.
+
+Пользователи на короткое время сохраняются в памяти процесса, чтобы частые
+запросы одних и тех же пользователей не обращались к БД: целиком для токенов
+без утверждений и отложенные поля для токенов с ними.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import get_cache
+from reviews.models import User
+
+CLAIMS = ('username', 'role', 'is_staff', 'token_version')
+
+
+def token_version_key(user_id):
+    return f'api:token_version:{user_id}'
+
+
+def get_token_version(user_id):
+    cache = get_cache()
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        version = User.objects.filter(id=user_id).values_list(
+            'token_version', flat=True,
+        ).first()
+        if version is not None:
+            set_token_version(user_id, version)
+    return version
+
+
+def set_token_version(user_id, version):
+    get_cache().set(
+        token_version_key(user_id), version,
+        settings.AUTH_TOKEN_VERSION_TIMEOUT,
+    )
+
+
+def forget_token_version(user_id):
+    get_cache().delete(token_version_key(user_id))
+
+
+def get_access_token(user):
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserCache:
+    """Ограниченный по размеру и времени жизни LRU-кэш пользователей.
+
+    Хранятся значения полей, а не объекты, поэтому каждый запрос получает
+    собственный экземпляр `User`.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.fields = None
+
+    def get(self, user_id, load):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                return User.from_db('default', self.fields, entry[1])
+            self.misses += 1
+        user = load()
+        if self.fields is None:
+            self.fields = [
+                field.attname for field in User._meta.concrete_fields
+            ]
+        values = [getattr(user, field) for field in self.fields]
+        with self.lock:
+            self.entries[user_id] = (now + self.timeout, values)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return user
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {
+            'hit': self.hits,
+            'miss': self.misses,
+            'size': len(self.entries),
+        }
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TIMEOUT,
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Берёт пользователя из кэша процесса, обращаясь к БД при промахе."""
+
+    def get_user(self, validated_token):
+        return user_cache.get(
+            validated_token.get(api_settings.USER_ID_CLAIM),
+            lambda: super(CachedJWTAuthentication, self).get_user(
+                validated_token
+            ),
+        )
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """Берёт пользователя из утверждений токена, а не из БД.
+
+    Токены без утверждений, выданные раньше, проверяются как обычно.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token['token_version'] != get_token_version(user_id):
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        values = {'id': user_id}
+        values.update((claim, validated_token[claim]) for claim in CLAIMS)
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        user = User.from_db(
+            'default', fields, [values[field] for field in fields],
+        )
+        user.deferred_loader = self.load_deferred
+        return user
+
+    def load_deferred(self, user, fields):
+        cached = user_cache.get(
+            user.pk, lambda: User.objects.get(pk=user.pk),
+        )
+        for field in fields:
+            setattr(user, field, getattr(cached, field))
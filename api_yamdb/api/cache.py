@@ -0,0 +1,134 @@
+"""Версии данных API и кэш ответов для анонимных пользователей.
+
+Ключ ответа включает версию пространства имён (`titles`, `genres`, ...).
+Версия - время последнего изменения в наносекундах: при изменении моделей
+она обновляется, и старые ответы перестают находиться, не требуя перебора
+ключей в кэше. Эти же версии служат основой для ETag и Last-Modified.
+Версии живут `API_VERSION_TIMEOUT` секунд и затем выдаются заново, поэтому
+процесс, не получивший изменение, отдаёт устаревшие данные ограниченное
+время.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+HIT = 'hit'
+MISS = 'miss'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+def version_timeout():
+    return settings.API_VERSION_TIMEOUT or None
+
+
+def get_version(namespace):
+    cache = get_cache()
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), time.time_ns(), version_timeout())
+        version = cache.get(version_key(namespace))
+    return version
+
+
+def bump_version(*namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        key = version_key(namespace)
+        cache.set(
+            key,
+            max(time.time_ns(), cache.get(key, 0) + 1),
+            version_timeout(),
+        )
+
+
+def version_time(version):
+    """Момент изменения данных, соответствующий версии."""
+    return datetime.fromtimestamp(version / 10**9, tz=timezone.utc)
+
+
+def response_key(namespace, request):
+    query = urlencode(sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    ))
+    url = f'{request.get_host()}{request.path}?{query}'
+    return 'api:response:{}:{}:{}'.format(
+        namespace,
+        get_version(namespace),
+        hashlib.md5(url.encode()).hexdigest(),
+    )
+
+
+def count(event):
+    cache = get_cache()
+    if not cache.add(f'api:stats:{event}', 1, None):
+        cache.incr(f'api:stats:{event}')
+
+
+def stats():
+    cache = get_cache()
+    return {
+        event: cache.get(f'api:stats:{event}', 0) for event in (HIT, MISS)
+    }
+
+
+class LocalIndex:
+    """Данные в памяти процесса, сверяемые с версией в кэше.
+
+    Процесс, где изменилась модель, правит свою копию через `update`, а
+    остальные замечают новую версию и перестраивают копию через `build`.
+    Без общего кэша новая версия до других процессов не доходит, поэтому
+    копия перестраивается и тогда, когда она старше `LOCAL_INDEX_TIMEOUT`
+    секунд.
+    """
+
+    namespace = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def is_fresh(self, version):
+        if version != self.version:
+            return False
+        timeout = settings.LOCAL_INDEX_TIMEOUT
+        return not timeout or time.monotonic() - self.built_at < timeout
+
+    def ensure_fresh(self):
+        version = get_version(self.namespace)
+        if not self.is_fresh(version):
+            with self.lock:
+                if not self.is_fresh(version):
+                    self.build()
+                    self.version = version
+                    self.built_at = time.monotonic()
+
+    def update(self, apply):
+        """Применяет изменение к копии процесса и меняет версию.
+
+        Если apply вернул False, данные не изменились и версия остаётся.
+        Устаревшая копия не правится: её всё равно придётся перестроить.
+        """
+        with self.lock:
+            if self.version != get_version(self.namespace):
+                bump_version(self.namespace)
+            elif apply() is not False:
+                bump_version(self.namespace)
+                self.version = get_version(self.namespace)
@@ -0,0 +1,29 @@
+"""Проверки настроек кэша при запуске."""
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Бэкенды, которые не разделяют данные между процессами.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_local_cache(app_configs, **kwargs):
+    """Без общего кэша версии и индексы должны истекать."""
+    backend = settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+    if backend not in LOCAL_BACKENDS:
+        return []
+    return [
+        Error(
+            f'{name}=0 допустимо только с общим кэшем: с {backend} другие '
+            'процессы не увидят изменений данных.',
+            hint=f'Задайте {name} больше нуля или общий кэш в CACHE_BACKEND.',
+            id=f'api.E00{number}',
+        )
+        for number, name in enumerate(
+            ('API_VERSION_TIMEOUT', 'LOCAL_INDEX_TIMEOUT'), start=1,
+        )
+        if not getattr(settings, name)
+    ]
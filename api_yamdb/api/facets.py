@@ -0,0 +1,106 @@
+"""Количество произведений по жанрам, категориям и десятилетиям.
+
+Запрошенные фасеты считаются одним запросом - UNION ALL группировок по
+отфильтрованному списку произведений. Результат кэшируется по набору
+фильтров и версии `titles`, поэтому сбрасывается при изменении
+произведений, отзывов, жанров и категорий.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from api import cache
+from reviews.models import Title
+
+GenreTitle = Title.genre.through
+
+FACETS_PARAM = 'facets'
+FACETS = ('genre', 'category', 'year')
+
+# Параметры, которые не меняют набор произведений.
+PAGE_PARAMS = {FACETS_PARAM, 'limit', 'offset', 'cursor', 'count'}
+
+
+def get_facet_names(request):
+    value = request.query_params.get(FACETS_PARAM)
+    if value is None:
+        return ()
+    names = {name for name in map(str.strip, value.split(',')) if name}
+    unknown = names - set(FACETS)
+    if unknown or not names:
+        raise ValidationError({FACETS_PARAM: (
+            f'Неизвестные фасеты: {", ".join(sorted(unknown))}. '
+            f'Доступны: {", ".join(FACETS)}.'
+        )})
+    return tuple(name for name in FACETS if name in names)
+
+
+def facets_key(names, request):
+    query = urlencode(sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if key not in PAGE_PARAMS
+        for value in values
+    ))
+    signature = f'{",".join(names)}?{query}'
+    return 'api:facets:{}:{}'.format(
+        cache.get_version('titles'),
+        hashlib.md5(signature.encode()).hexdigest(),
+    )
+
+
+def group(queryset, name, key, label):
+    return queryset.values(
+        facet=Value(name, output_field=CharField()),
+        key=key,
+        label=label,
+    ).annotate(count=Count('*')).order_by()
+
+
+def count_facets(queryset, names):
+    titles = Title.objects.filter(pk__in=queryset.order_by().values('pk'))
+    groups = {
+        'genre': lambda: group(
+            GenreTitle.objects.filter(title__in=titles),
+            'genre', F('genre__slug'), F('genre__name'),
+        ),
+        'category': lambda: group(
+            titles.filter(category__isnull=False),
+            'category', F('category__slug'), F('category__name'),
+        ),
+        'year': lambda: group(
+            titles, 'year', Cast(F('year') / 10 * 10, CharField()),
+            Value('', output_field=CharField()),
+        ),
+    }
+    first, *rest = (groups[name]() for name in names)
+    facets = {name: [] for name in names}
+    for row in first.union(*rest, all=True):
+        if row['facet'] == 'year':
+            item = {'decade': int(row['key']), 'count': row['count']}
+        else:
+            item = {
+                'slug': row['key'], 'name': row['label'],
+                'count': row['count'],
+            }
+        facets[row['facet']].append(item)
+    for name, items in facets.items():
+        if name == 'year':
+            items.sort(key=lambda item: item['decade'])
+        else:
+            items.sort(key=lambda item: (-item['count'], item['name']))
+    return facets
+
+
+def get_facets(queryset, names, request):
+    """Фасеты для отфильтрованного списка произведений с кэшированием."""
+    key = facets_key(names, request)
+    facets = cache.get_cache().get(key)
+    if facets is None:
+        facets = count_facets(queryset, names)
+        cache.get_cache().set(key, facets, settings.API_CACHE_TIMEOUT)
+    return facets
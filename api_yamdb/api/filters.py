@@ -1,16 +1,80 @@
 import django_filters
+from django.conf import settings
+from django.db import connection
+from rest_framework.filters import BaseFilterBackend
 
-from reviews.models import Title
+from api.membership import GenreTitle, count, from_bitmap, membership
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
+
+ANY = 'any'
+ALL = 'all'
+
+
+def get_slugs(value):
+    return [slug for slug in map(str.strip, value.split(',')) if slug]
 
 
 class TitleFilter(django_filters.FilterSet):
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-    )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
+    """Фильтр произведений.
+
+    `genre` и `category` принимают несколько slug через запятую. Жанры
+    объединяются по `genre_mode`: `any` - хотя бы один, `all` - все сразу.
+    Принадлежность проверяется по битовым картам в памяти процесса.
+    """
+
+    category = django_filters.CharFilter(method='filter_membership')
+    genre = django_filters.CharFilter(method='filter_membership')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=((ANY, 'хотя бы один жанр'), (ALL, 'все жанры')),
+        method='filter_membership',
     )
 
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year')
+
+    def filter_membership(self, queryset, name, value):
+        # Параметры зависят друг от друга и применяются в filter_queryset.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        genres = get_slugs(self.form.cleaned_data['genre'])
+        categories = get_slugs(self.form.cleaned_data['category'])
+        match_all = self.form.cleaned_data['genre_mode'] == ALL
+        bitmaps = []
+        if genres:
+            bitmaps.append(membership.get_bitmap(Genre, genres, match_all))
+        if categories:
+            bitmaps.append(membership.get_bitmap(Category, categories))
+        if not bitmaps:
+            return queryset
+        bitmap = bitmaps[0] if len(bitmaps) == 1 else bitmaps[0] & bitmaps[1]
+        if count(bitmap) <= settings.TITLE_FILTER_MAX_IDS:
+            return queryset.filter(pk__in=from_bitmap(bitmap))
+        return self.filter_in_database(queryset, genres, categories, match_all)
+
+    def filter_in_database(self, queryset, genres, categories, match_all):
+        """Запасной путь для фильтров, под которые подходит много строк."""
+        if categories:
+            queryset = queryset.filter(category__slug__in=categories)
+        if not genres:
+            return queryset
+        for group in [[slug] for slug in genres] if match_all else [genres]:
+            queryset = queryset.filter(pk__in=GenreTitle.objects.filter(
+                genre__slug__in=group,
+            ).values('title_id'))
+        return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск `?search=` с сортировкой по релевантности."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param)
+        if text is None:
+            return queryset
+        return search_titles(queryset, text, connection)
@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+
+def build_handler():
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+class Command(BaseCommand):
+    help = 'Сравнить накладные расходы middleware на запросах к API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Количество запросов для каждого замера',
+        )
+        parser.add_argument(
+            '--path',
+            default='/api/v1/genres/',
+            help='Адрес, на который отправляются запросы',
+        )
+
+    def handle(self, *args, **options):
+        full_middleware = [
+            path for path in settings.MIDDLEWARE
+            if path != 'api_yamdb.middleware.PathScopedMiddleware'
+        ]
+        full_middleware[1:1] = settings.SCOPED_MIDDLEWARE
+        with override_settings(MIDDLEWARE=full_middleware):
+            handlers = (
+                ('все middleware', build_handler()),
+            )
+        handlers += (('PathScopedMiddleware', build_handler()),)
+        request = RequestFactory().get(
+            options['path'], HTTP_HOST=settings.ALLOWED_HOSTS[0],
+        )
+        results = []
+        for name, handler in handlers:
+            handler.get_response(request)
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                handler.get_response(request)
+            elapsed = time.perf_counter() - started
+            results.append(elapsed / options['requests'] * 10**6)
+            self.stdout.write(
+                f'{name}: {results[-1]:.1f} мкс на запрос'
+            )
+        self.stdout.write(
+            f'Экономия: {results[0] - results[1]:.1f} мкс на запрос'
+        )
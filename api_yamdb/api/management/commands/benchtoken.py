@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api.views import APIGetToken
+from reviews.models import User
+from reviews.tokens import confirmation_code_generator
+
+
+class Command(BaseCommand):
+    help = 'Измерить скорость выдачи JWT-токенов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Количество выданных токенов для каждого замера',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(
+                username='benchtoken', email='benchtoken@yamdb.fake',
+            )
+            factory = APIRequestFactory()
+            view = APIGetToken.as_view()
+            benchmarks = (
+                (
+                    'RefreshToken.for_user().access_token',
+                    lambda: str(RefreshToken.for_user(user).access_token),
+                ),
+                (
+                    'AccessToken.for_user()',
+                    lambda: str(AccessToken.for_user(user)),
+                ),
+                (
+                    'POST /api/v1/auth/token/',
+                    lambda: self.exchange(view, factory, user),
+                ),
+            )
+            for name, issue in benchmarks:
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    issue()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{name}: {options["requests"] / elapsed:.0f} токенов/с'
+                )
+            transaction.set_rollback(True)
+
+    def exchange(self, view, factory, user):
+        # Код одноразовый: для каждого запроса выдаётся новый.
+        data = {
+            'username': user.username,
+            'confirmation_code': confirmation_code_generator.make_token(user),
+        }
+        response = view(
+            factory.post('/api/v1/auth/token/', data, format='json'),
+        )
+        if response.status_code != 200:
+            raise CommandError(f'Токен не выдан: {response.data}.')
+        user.confirmation_code_version += 1
+        return response
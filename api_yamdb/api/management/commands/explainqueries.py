@@ -0,0 +1,216 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from api.membership import membership
+from api.suggest import INDEXES
+from reviews.models import (
+    ADMIN,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    User,
+)
+
+GenreTitle = Title.genre.through
+
+# Полный просмотр таблицы в планах SQLite и PostgreSQL.
+FULL_SCAN_PATTERNS = (
+    re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)$'),
+    re.compile(r'Seq Scan on (?P<table>\w+)'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполнить EXPLAIN для запросов представлений API на большом '
+        'наборе данных и найти полные просмотры таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles',
+            type=int,
+            default=20000,
+            help='Количество произведений в тестовых данных',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Таблицы меньшего размера можно просматривать целиком',
+        )
+
+    def handle(self, *args, **options):
+        self.min_rows = options['min_rows']
+        with transaction.atomic():
+            self.seed(options['titles'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.sizes = {
+                model._meta.db_table: model.objects.count()
+                for model in (
+                    Category, Genre, Title, GenreTitle, Review, Comment, User,
+                )
+            }
+            # Индексы в памяти читают таблицы целиком один раз на процесс,
+            # а не на каждый запрос, поэтому строятся до проверки.
+            for index in (membership, *INDEXES.values()):
+                index.ensure_fresh()
+            # APIClient отправляет заголовок Host: testserver.
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            ):
+                problems = sum(
+                    self.check_url(client, url)
+                    for client, url in self.get_requests()
+                )
+            transaction.set_rollback(True)
+        if problems:
+            raise CommandError(f'Найдено проблемных запросов: {problems}.')
+        self.stdout.write('Все запросы используют индексы.')
+
+    def seed(self, size):
+        Category.objects.bulk_create(
+            Category(name=f'Категория {idx}', slug=f'category-{idx}')
+            for idx in range(10)
+        )
+        # bulk_create в SQLite не заполняет pk созданных объектов, а
+        # сортировка по умолчанию идёт по названию, поэтому id читаются
+        # в порядке создания.
+        categories = list(
+            Category.objects.order_by('id').values_list('id', flat=True)
+        )
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(20)
+        )
+        User.objects.bulk_create(
+            User(username=f'explain{idx}', email=f'explain{idx}@yamdb.fake')
+            for idx in range(100)
+        )
+        User.objects.create(
+            username='explain_admin', email='explain_admin@yamdb.fake',
+            role=ADMIN,
+        )
+        Title.objects.bulk_create(
+            Title(
+                name=f'Произведение {idx}',
+                year=1900 + idx % 120,
+                category_id=categories[idx % len(categories)],
+            )
+            for idx in range(size)
+        )
+        self.titles = list(Title.objects.values_list('id', flat=True))
+        self.genres = list(
+            Genre.objects.order_by('id').values_list('id', flat=True)
+        )
+        self.users = list(User.objects.values_list('id', flat=True))
+        # Два соседних жанра, чтобы `genre_mode=all` находил произведения.
+        GenreTitle.objects.bulk_create(
+            GenreTitle(
+                title_id=title_id,
+                genre_id=self.genres[(idx + shift) % len(self.genres)],
+            )
+            for idx, title_id in enumerate(self.titles)
+            for shift in (0, 1)
+        )
+        Review.objects.bulk_create(
+            Review(
+                title_id=title_id,
+                author_id=author_id,
+                text='text',
+                score=5,
+            )
+            for title_id in self.titles[:size // 10]
+            for author_id in self.users[:10]
+        )
+        review_ids = Review.objects.values_list('id', flat=True)
+        Comment.objects.bulk_create(
+            Comment(review_id=review_id, author_id=self.users[0], text='text')
+            for review_id in review_ids
+        )
+
+    def get_requests(self):
+        # Ответы анонимам кэшируются, а тестовые данные не должны попасть
+        # в общий кэш, поэтому запросы выполняются от имени пользователя.
+        reader = APIClient()
+        reader.force_authenticate(User.objects.get(pk=self.users[0]))
+        admin = APIClient()
+        admin.force_authenticate(User.objects.get(username='explain_admin'))
+        title = Title.objects.get(pk=self.titles[0])
+        review = Review.objects.filter(title=title).first()
+        titles = '/api/v1/titles/'
+        reviews = f'{titles}{title.pk}/reviews/'
+        comments = f'{reviews}{review.pk}/comments/'
+        return (
+            (reader, '/api/v1/categories/'),
+            (reader, '/api/v1/genres/'),
+            (reader, titles),
+            (reader, f'{titles}?cursor=&count=false'),
+            (reader, f'{titles}?year=1950'),
+            (reader, f'{titles}?name={title.name}'),
+            (reader, f'{titles}?category=category-1'),
+            (reader, f'{titles}?genre=genre-1'),
+            (reader, f'{titles}?genre=genre-1,genre-2&genre_mode=all'),
+            (reader, f'{titles}?genre=genre-1,genre-2&category=category-1'),
+            (reader, '/api/v1/suggest/?q=произв'),
+            (reader, f'{titles}?search={title.name}'),
+            (reader, f'{titles}{title.pk}/'),
+            (reader, reviews),
+            (reader, f'{reviews}?cursor=&count=false'),
+            (reader, f'{reviews}{review.pk}/'),
+            (reader, comments),
+            (reader, f'{comments}?cursor=&count=false'),
+            (admin, '/api/v1/users/'),
+            (admin, '/api/v1/users/me/'),
+        )
+
+    def check_url(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}.')
+        problems = 0
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            errors = self.check_plan(self.explain(query['sql']))
+            if errors:
+                problems += 1
+                self.stdout.write(self.style.ERROR(f'{url}: {query["sql"]}'))
+                for error in errors:
+                    self.stdout.write(f'    полный просмотр: {error}')
+            elif self.verbosity > 1:
+                self.stdout.write(f'{url}: {query["sql"]}')
+        if self.verbosity > 0:
+            self.stdout.write(
+                f'{url}: запросов {len(context.captured_queries)}'
+            )
+        return problems
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def check_plan(self, plan):
+        errors = []
+        for line in map(str.strip, plan):
+            for pattern in FULL_SCAN_PATTERNS:
+                match = pattern.search(line)
+                if match and self.sizes.get(match['table'], 0) >= (
+                    self.min_rows
+                ):
+                    errors.append(line)
+        return errors
+
+    def execute(self, *args, **options):
+        self.verbosity = options['verbosity']
+        return super().execute(*args, **options)
@@ -0,0 +1,151 @@
+"""Принадлежность произведений жанрам и категориям в памяти процесса.
+
+Для каждого жанра и категории хранится битовая карта произведений - целое
+число, в котором установлены биты с номерами id. Фильтр по нескольким
+жанрам сводится к `&` или `|` таких чисел без соединений в SQL. Сигналы
+моделей и `m2m_changed` на `Title.genre` правят карты точечно, остальные
+процессы перестраивают их по версии в кэше или по истечении
+`LOCAL_INDEX_TIMEOUT`, как индекс подсказок.
+"""
+from api.cache import LocalIndex
+from reviews.models import Category, Genre, Title
+
+GenreTitle = Title.genre.through
+
+
+def to_bitmap(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def from_bitmap(bitmap):
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    return [
+        offset * 8 + bit
+        for offset, byte in enumerate(data) if byte
+        for bit in range(8) if byte >> bit & 1
+    ]
+
+
+def count(bitmap):
+    return bin(bitmap).count('1')
+
+
+class MembershipIndex(LocalIndex):
+    """Битовые карты произведений по жанрам и категориям."""
+
+    namespace = 'membership'
+
+    def __init__(self):
+        super().__init__()
+        self.slugs = {Genre: {}, Category: {}}
+        self.bitmaps = {Genre: {}, Category: {}}
+        self.title_categories = {}
+
+    def build(self):
+        slugs = {
+            model: dict(model.objects.values_list('slug', 'pk'))
+            for model in (Genre, Category)
+        }
+        members = {Genre: {}, Category: {}}
+        for title_id, genre_id in GenreTitle.objects.values_list(
+            'title_id', 'genre_id',
+        ).iterator():
+            members[Genre].setdefault(genre_id, []).append(title_id)
+        title_categories = dict(
+            Title.objects.filter(category__isnull=False).values_list(
+                'pk', 'category_id',
+            ).iterator()
+        )
+        for title_id, category_id in title_categories.items():
+            members[Category].setdefault(category_id, []).append(title_id)
+        self.slugs = slugs
+        self.bitmaps = {
+            model: {pk: to_bitmap(ids) for pk, ids in groups.items()}
+            for model, groups in members.items()
+        }
+        self.title_categories = title_categories
+
+    def get_bitmap(self, model, slugs, match_all=False):
+        """Произведения хотя бы одного (или всех) из указанных групп."""
+        self.ensure_fresh()
+        with self.lock:
+            bitmaps = [
+                self.bitmaps[model].get(self.slugs[model].get(slug), 0)
+                for slug in slugs
+            ]
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if match_all else result | bitmap
+        return result
+
+    def add(self, model, group_id, title_ids):
+        bitmaps = self.bitmaps[model]
+        bitmaps[group_id] = bitmaps.get(group_id, 0) | to_bitmap(title_ids)
+
+    def discard(self, model, group_id, title_ids):
+        bitmaps = self.bitmaps[model]
+        if group_id in bitmaps:
+            bitmaps[group_id] &= ~to_bitmap(title_ids)
+
+    def group_changed(self, instance, deleted=False):
+        model = type(instance)
+
+        def apply():
+            slugs = self.slugs[model]
+            if not deleted and slugs.get(instance.slug) == instance.pk:
+                return False
+            for slug, pk in list(slugs.items()):
+                if pk == instance.pk:
+                    del slugs[slug]
+            if deleted:
+                self.bitmaps[model].pop(instance.pk, None)
+            else:
+                slugs[instance.slug] = instance.pk
+
+        self.update(apply)
+
+    def title_changed(self, instance, deleted=False):
+        category_id = None if deleted else instance.category_id
+
+        def apply():
+            old_category_id = self.title_categories.get(instance.pk)
+            if deleted:
+                for genre_id in self.bitmaps[Genre]:
+                    self.discard(Genre, genre_id, (instance.pk,))
+            elif old_category_id == category_id:
+                return False
+            self.discard(Category, old_category_id, (instance.pk,))
+            self.title_categories.pop(instance.pk, None)
+            if category_id is not None:
+                self.add(Category, category_id, (instance.pk,))
+                self.title_categories[instance.pk] = category_id
+
+        self.update(apply)
+
+    def genres_changed(self, instance, action, reverse, pk_set):
+        """Обрабатывает `m2m_changed` на `Title.genre` с обеих сторон."""
+
+        def apply():
+            if action == 'post_clear' and reverse:
+                self.bitmaps[Genre].pop(instance.pk, None)
+            elif action == 'post_clear':
+                for genre_id in self.bitmaps[Genre]:
+                    self.discard(Genre, genre_id, (instance.pk,))
+            else:
+                change = self.add if action == 'post_add' else self.discard
+                if reverse:
+                    change(Genre, instance.pk, pk_set)
+                else:
+                    for genre_id in pk_set:
+                        change(Genre, genre_id, (instance.pk,))
+
+        self.update(apply)
+
+
+membership = MembershipIndex()
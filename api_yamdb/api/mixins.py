@@ -1,12 +1,156 @@
-from rest_framework import filters, mixins, viewsets
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 
+from api import cache
 from api.permissions import (
     IsAdminUserOrReadOnly,
 )
 
 
+def async_read_view(view):
+    """Асинхронная обёртка над синхронным представлением DRF.
+
+    Чтение выполняется в пуле потоков (thread_sensitive=False), поэтому
+    одновременные запросы не ждут друг друга в единственном потоке для
+    синхронного кода. У каждого потока своё соединение с БД, оно
+    закрывается по тем же правилам, что и в конце обычного запроса.
+    Изменяющие запросы по-прежнему выполняются в общем потоке.
+    """
+    def read(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    read = sync_to_async(read, thread_sensitive=False)
+    write = sync_to_async(view)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return async_view
+
+
+class AsyncReadMixin:
+    """Асинхронные представления при ASYNC_CATALOG_VIEWS = True."""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        if settings.ASYNC_CATALOG_VIEWS:
+            return async_read_view(view)
+        return view
+
+
+class ConditionalListMixin:
+    """ETag и Last-Modified для списка объектов.
+
+    Валидаторы строятся по версиям данных из кэша, без запросов к БД: при
+    совпадении If-None-Match или If-Modified-Since ответ 304 отдаётся без
+    выборки и сериализации объектов.
+    """
+
+    etag_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def get_etag_namespaces(self):
+        return self.etag_namespaces
+
+    def conditional(self, action, request, *args, **kwargs):
+        versions = [
+            cache.get_version(namespace)
+            for namespace in self.get_etag_namespaces()
+        ]
+        last_modified = cache.version_time(max(versions))
+        etag = quote_etag(hashlib.md5(repr((
+            versions,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            request.user.pk,
+        )).encode()).hexdigest())
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            response = action(request, *args, **kwargs)
+        elif response.status_code == status.HTTP_304_NOT_MODIFIED:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalReadMixin(ConditionalListMixin):
+    """ETag и Last-Modified для списка и отдельных объектов."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CachedListMixin:
+    """Кэширует список объектов для анонимных пользователей."""
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def cached(self, action, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return action(request, *args, **kwargs)
+        key = cache.response_key(self.cache_namespace, request)
+        data = cache.get_cache().get(key)
+        if data is not None:
+            cache.count(cache.HIT)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        cache.count(cache.MISS)
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.get_cache().set(
+                key, response.data, settings.API_CACHE_TIMEOUT,
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedReadMixin(CachedListMixin):
+    """Кэширует список и отдельные объекты для анонимных пользователей."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+
 class CreateListDestroyViewSet(
+    AsyncReadMixin,
+    ConditionalListMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -17,3 +161,24 @@ class CreateListDestroyViewSet(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class NestedViewSetMixin:
+    """Вложенный ресурс, родитель которого загружается один раз за запрос.
+
+    Список не запрашивает родителя отдельно: объекты выбираются по id из
+    URL, а существование родителя проверяется только для пустой страницы.
+    """
+
+    def get_parent_queryset(self):
+        raise NotImplementedError
+
+    @cached_property
+    def parent(self):
+        return get_object_or_404(self.get_parent_queryset())
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.parent
+        return page
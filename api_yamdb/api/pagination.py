@@ -0,0 +1,174 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с режимом курсора по ключу сортировки.
+
+    Параметр `cursor` включает постраничный обход без OFFSET: страница
+    выбирается условием на поля сортировки модели и `id`, поэтому время
+    ответа не растёт с глубиной. Параметр `count=false` отключает подсчёт
+    общего количества объектов в обоих режимах.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.use_cursor = self.cursor_query_param in request.query_params
+        self.use_count = request.query_params.get(
+            self.count_query_param, ''
+        ).lower() not in ('false', '0')
+        if not self.use_cursor and self.use_count:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        if self.use_count:
+            self.count = self.get_count(queryset)
+        if self.use_cursor:
+            return self.paginate_by_cursor(queryset, request)
+        self.offset = self.get_offset(request)
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def paginate_by_cursor(self, queryset, request):
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            position = self.parse_position(queryset, position)
+            queryset = queryset.filter(self.get_seek_filter(position))
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.next_position = (
+            self.get_position(page[-1]) if self.has_next else None
+        )
+        return page
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if 'id' not in ordering and '-id' not in ordering:
+            ordering.append('id')
+        return ordering
+
+    def get_seek_filter(self, position):
+        seek_filter = Q()
+        for index, field in enumerate(self.ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(
+                **{f'{field.lstrip("-")}__{lookup}': position[index]}
+            )
+            for previous, value in zip(self.ordering, position[:index]):
+                condition &= Q(**{previous.lstrip('-'): value})
+            seek_filter |= condition
+        return seek_filter
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            value = obj
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_field(self, queryset, field_name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        names = field_name.lstrip('-').split('__')
+        if names[0] in queryset.query.annotations:
+            return queryset.query.annotations[names[0]].output_field
+        model, field = queryset.model, None
+        for name in names:
+            if field is not None:
+                model = field.related_model
+            field = model._meta.get_field(name)
+        return field
+
+    def parse_position(self, queryset, position):
+        """Приводит значения курсора к типам полей сортировки."""
+        parsed = []
+        for field_name, value in zip(self.ordering, position):
+            field = self.get_field(queryset, field_name)
+            try:
+                value = field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None or isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            parsed.append(value)
+        return parsed
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(
+            json.dumps(position).encode()
+        ).decode()
+
+    def get_next_link(self):
+        if self.use_cursor:
+            if not self.has_next:
+                return None
+            url = remove_query_param(
+                self.request.build_absolute_uri(), self.offset_query_param,
+            )
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url,
+                self.cursor_query_param,
+                self.encode_cursor(self.next_position),
+            )
+        if not self.use_count:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit,
+            )
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.use_cursor:
+            return None
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.use_count:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
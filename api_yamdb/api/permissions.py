@@ -21,9 +21,10 @@ class AdminModeratorAuthorPermission(BasePermission):
         return request.method in SAFE_METHODS or request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
+        """Роль проверяется раньше автора, автор сравнивается по id."""
         return (
             request.method in SAFE_METHODS
-            or obj.author == request.user
             or request.user.is_moderator
             or request.user.is_admin
+            or obj.author_id == request.user.pk
         )
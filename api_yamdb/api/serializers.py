@@ -1,6 +1,5 @@
 from datetime import datetime
 
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
@@ -28,6 +27,11 @@ class UserSerializer(serializers.ModelSerializer):
         except AttributeError:
             return role
 
+    def update(self, instance, validated_data):
+        if validated_data.get('role', instance.role) != instance.role:
+            validated_data['token_version'] = instance.token_version + 1
+        return super().update(instance, validated_data)
+
 
 class NotAdminSerializer(serializers.ModelSerializer):
     class Meta:
@@ -74,17 +78,14 @@ class SignUpSerializer(serializers.Serializer):
         return email
 
 
-class GetTokenSerializer(serializers.ModelSerializer):
+class GetTokenSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
-    def validate(self, attrs):
-        self.instance.validate_confirmation_code(attrs['confirmation_code'])
-        return attrs
 
-    class Meta:
-        model = User
-        fields = ('username', 'confirmation_code')
+class SuggestSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=256)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -102,7 +103,7 @@ class GenreSerializer(serializers.ModelSerializer):
 class TitleReadOnlySerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -116,12 +117,6 @@ class TitleReadOnlySerializer(serializers.ModelSerializer):
             'category',
         )
 
-    def get_rating(self, obj):
-        review = Review.objects.filter(title=obj.id)
-        if review.exists() is True:
-            return round(review.aggregate(Avg('score'))['score__avg'], 1)
-        return None
-
 
 class TitleSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
@@ -157,9 +152,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         if self.context['request'].method != 'POST':
             return data
-        user = self.context['request'].user
-        title_id = self.context['request'].parser_context['kwargs']['title_id']
-        if Review.objects.filter(author=user, title__id=title_id).exists():
+        if self.context['title'].has_user_review:
             raise serializers.ValidationError(
                 'Вы уже оставили отзыв на данное произведение',
             )
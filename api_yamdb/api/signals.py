@@ -0,0 +1,131 @@
+"""Сброс версий кэша и индексов в памяти при изменении моделей.
+
+Всё выполняется после фиксации транзакции: иначе параллельный запрос мог
+бы увидеть новую версию, прочитать ещё старые строки и сохранить их в кэше
+или индексе под новой версией.
+"""
+from copy import copy
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import (
+    forget_token_version,
+    set_token_version,
+    user_cache,
+)
+from api.cache import bump_version
+from api.membership import membership
+from api.suggest import MODEL_INDEXES
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+NAMESPACES = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Title: ('titles',),
+    Review: ('titles',),
+    User: ('users',),
+}
+
+PARENT_NAMESPACES = {
+    Review: ('reviews', 'title_id'),
+    Comment: ('comments', 'review_id'),
+}
+
+
+def connect(handler, models):
+    """Подключает обработчик только к нужным моделям.
+
+    Обработчик `post_delete` без `sender` отключает быстрое удаление
+    каскадом для всех моделей: Django загружает удаляемые строки, чтобы
+    отправить по ним сигналы.
+    """
+    for model in models:
+        post_save.connect(handler, sender=model)
+        post_delete.connect(handler, sender=model)
+
+
+def data_changed(sender, instance, **kwargs):
+    namespaces = list(NAMESPACES.get(sender, ()))
+    if sender in PARENT_NAMESPACES:
+        prefix, parent_field = PARENT_NAMESPACES[sender]
+        namespaces.append(f'{prefix}:{getattr(instance, parent_field)}')
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+connect(data_changed, {*NAMESPACES, *PARENT_NAMESPACES})
+
+
+# После удаления Django обнуляет pk объекта, поэтому в отложенные функции
+# передаётся копия, снятая в момент сигнала.
+
+def suggest_changed(sender, instance, signal, **kwargs):
+    index, instance = MODEL_INDEXES[sender], copy(instance)
+    transaction.on_commit(lambda: index.changed(
+        instance, deleted=signal is post_delete,
+    ))
+
+
+connect(suggest_changed, MODEL_INDEXES)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_membership_changed(sender, instance, signal, **kwargs):
+    instance = copy(instance)
+    transaction.on_commit(lambda: membership.title_changed(
+        instance, deleted=signal is post_delete,
+    ))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def group_membership_changed(sender, instance, signal, **kwargs):
+    instance = copy(instance)
+    transaction.on_commit(lambda: membership.group_changed(
+        instance, deleted=signal is post_delete,
+    ))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        pk_set = set(pk_set or ())
+
+        def changed():
+            bump_version('titles')
+            membership.genres_changed(instance, action, reverse, pk_set)
+
+        transaction.on_commit(changed)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, signal, created=False, **kwargs):
+    pk = instance.pk
+    # Имена авторов видны в отзывах и комментариях, а остальные поля - нет.
+    renamed = signal is post_delete or (
+        not created and instance.username_changed
+    )
+    if signal is post_save and renamed:
+        instance.saved_username = instance.username
+    version = None
+    if (
+        signal is post_save
+        and 'token_version' not in instance.get_deferred_fields()
+    ):
+        version = instance.token_version
+
+    def changed():
+        if version is None:
+            forget_token_version(pk)
+        else:
+            set_token_version(pk, version)
+        user_cache.discard(pk)
+        if renamed:
+            bump_version('authors')
+
+    transaction.on_commit(changed)
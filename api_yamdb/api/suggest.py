@@ -0,0 +1,105 @@
+"""Подсказки по началу названия без обращения к БД.
+
+Для произведений, жанров и категорий в памяти процесса хранится
+отсортированный список ключей - названий в нижнем регистре, начиная с
+каждого слова. Подходящие под префикс ключи находятся двоичным поиском.
+Сигналы моделей обновляют индекс текущего процесса точечно и меняют версию
+в кэше, по которой остальные процессы узнают, что индекс нужно перестроить.
+Без общего кэша индекс перестраивается через `LOCAL_INDEX_TIMEOUT` секунд.
+"""
+import re
+from bisect import bisect_left, insort
+
+from api.cache import LocalIndex
+from reviews.models import Category, Genre, Title
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е')
+
+
+def get_keys(name):
+    """Название, начиная с каждого слова: «война и мир», «и мир», «мир»."""
+    name = normalize(name)
+    return {name[match.start():] for match in re.finditer(r'\w+', name)}
+
+
+class PrefixIndex(LocalIndex):
+    """Отсортированный массив ключей с поиском по префиксу."""
+
+    def __init__(self, name, model, fields):
+        super().__init__()
+        self.model = model
+        self.fields = fields
+        self.namespace = f'suggest:{name}'
+        self.entries = []
+        self.items = {}
+
+    def build(self):
+        entries = []
+        items = {}
+        rows = self.model.objects.values_list('pk', *self.fields)
+        for pk, *values in rows.iterator():
+            items[pk] = dict(zip(self.fields, values))
+            entries.extend((key, pk) for key in get_keys(items[pk]['name']))
+        entries.sort()
+        self.entries, self.items = entries, items
+
+    def search(self, prefix, limit):
+        self.ensure_fresh()
+        prefix = normalize(prefix)
+        found = {}
+        with self.lock:
+            position = bisect_left(self.entries, (prefix,))
+            while position < len(self.entries) and len(found) < limit:
+                key, pk = self.entries[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(pk, self.items[pk])
+                position += 1
+        return list(found.values())
+
+    def remove(self, pk):
+        item = self.items.pop(pk, None)
+        if item is None:
+            return
+        for key in get_keys(item['name']):
+            position = bisect_left(self.entries, (key, pk))
+            if self.entries[position:position + 1] == [(key, pk)]:
+                del self.entries[position]
+
+    def changed(self, instance, deleted=False):
+        """Точечно обновляет индекс процесса, где изменилась модель."""
+        item = None if deleted else {
+            field: getattr(instance, field) for field in self.fields
+        }
+
+        def apply():
+            if self.items.get(instance.pk) == item:
+                return False
+            self.remove(instance.pk)
+            if item is not None:
+                self.items[instance.pk] = item
+                for key in get_keys(item['name']):
+                    insort(self.entries, (key, instance.pk))
+
+        self.update(apply)
+
+
+INDEXES = {
+    name: PrefixIndex(name, model, fields)
+    for name, model, fields in (
+        ('titles', Title, ('id', 'name', 'year')),
+        ('genres', Genre, ('name', 'slug')),
+        ('categories', Category, ('name', 'slug')),
+    )
+}
+
+MODEL_INDEXES = {index.model: index for index in INDEXES.values()}
+
+
+def suggest(q, limit):
+    """Не больше limit подсказок каждого вида по началу слова в названии."""
+    return {
+        name: index.search(q, limit) for name, index in INDEXES.items()
+    }
@@ -2,8 +2,10 @@ from django.urls import include, path
 from rest_framework import routers
 
 from api.views import (
+    APICacheStats,
     APIGetToken,
     APISignup,
+    APISuggest,
     CategoryCreateListDestroyViewSet,
     CommentViewSet,
     GenreCreateListDestroyViewSet,
@@ -40,4 +42,6 @@ urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/auth/token/', APIGetToken.as_view(), name='get_token'),
     path('v1/auth/signup/', APISignup.as_view(), name='signup'),
+    path('v1/suggest/', APISuggest.as_view(), name='suggest'),
+    path('v1/cache/stats/', APICacheStats.as_view(), name='cache_stats'),
 ]
@@ -1,7 +1,5 @@
-import uuid
-
-from django.core.mail import EmailMessage
 from django.db import IntegrityError
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -11,9 +9,12 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from api.filters import TitleFilter
+from api import cache
+from api.authentication import get_access_token, user_cache
+from api.facets import get_facet_names, get_facets
+from api.filters import TitleFilter, TitleSearchFilter
+from api.pagination import KeysetPagination
 from api.permissions import (
     AdminModeratorAuthorPermission,
     AdminOnly,
@@ -26,16 +27,26 @@ from api.serializers import (
     GetTokenSerializer,
     ReviewSerializer,
     SignUpSerializer,
+    SuggestSerializer,
     TitleReadOnlySerializer,
     TitleSerializer,
     UserSerializer,
 )
-from api.mixins import CreateListDestroyViewSet
-from reviews.models import Category, Genre, Review, Title, User
+from api.mixins import (
+    AsyncReadMixin,
+    CachedReadMixin,
+    ConditionalReadMixin,
+    CreateListDestroyViewSet,
+    NestedViewSetMixin,
+)
+from api.suggest import suggest
+from reviews import confirmation, outbox
+from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
+    etag_namespaces = ('users',)
     serializer_class = UserSerializer
     pagination_class = LimitOffsetPagination
     permission_classes = [IsAuthenticated, AdminOnly]
@@ -57,8 +68,7 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def my_profile(self, request):
         if request.method == 'GET':
-            serializer = UserSerializer(request.user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.conditional(self.get_profile, request)
         serializer = UserSerializer(
             request.user,
             data=request.data,
@@ -68,29 +78,28 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def get_profile(self, request):
+        serializer = UserSerializer(request.user)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class APIGetToken(APIView):
     permission_classes = (AllowAny,)
 
     def post(self, request):
-        username = request.data.get('username')
-        confirmation_code = request.data.get('confirmation_code')
-        if not username:
-            return Response(
-                {'username': 'Имя пользователя обязательно!'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        user = get_object_or_404(User, username=username)
-        if not confirmation_code:
-            return Response(
-                {'confirmation_code': 'Код подтверждения обязателен!'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if confirmation_code != user.confirmation_code:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        token = RefreshToken.for_user(user).access_token
+        user = get_object_or_404(
+            User.objects.only(
+                'id', 'username', 'email', 'role', 'is_staff', 'token_version',
+                'confirmation_code_version',
+            ),
+            username=serializer.validated_data['username'],
+        )
+        user.use_confirmation_code(
+            serializer.validated_data['confirmation_code']
+        )
+        token = get_access_token(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
 
@@ -102,7 +111,6 @@ class APISignup(APIView):
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data['username']
         email = serializer.validated_data['email']
-        confirmation_code = str(uuid.uuid3(uuid.NAMESPACE_DNS, username))
         try:
             user, created = User.objects.get_or_create(
                 username=username,
@@ -113,76 +121,185 @@ class APISignup(APIView):
                 {'message': 'Пользователь с такими данными уже существует'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if not created:
+            confirmation.invalidate_codes(User.objects.filter(pk=user.pk))
+            user.confirmation_code_version += 1
+        outbox.enqueue(
+            subject=confirmation.SUBJECT,
+            body=confirmation.confirmation_body(user),
+            to=user.email,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
-        user.confirmation_code = confirmation_code
-        user.save()
-        email_body = (
-            f'Здравствуйте, {user.username}.'
-            f'\nКод подтверждения для доступа к API: {user.confirmation_code}'
+class APICacheStats(APIView):
+    permission_classes = (IsAuthenticated, AdminOnly)
+
+    def get(self, request):
+        return Response(
+            {**cache.stats(), 'users': user_cache.stats()},
+            status=status.HTTP_200_OK,
         )
-        email = EmailMessage(
-            subject='Код подтверждения для доступа к API!',
-            body=email_body,
-            to=[user.email],
+
+
+class APISuggest(APIView):
+    """Подсказки по началу названия из индекса в памяти, без запросов к БД."""
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        serializer = SuggestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            suggest(**serializer.validated_data),
+            status=status.HTTP_200_OK,
         )
-        email.send()
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class CategoryCreateListDestroyViewSet(CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'categories'
+    etag_namespaces = ('categories',)
 
 
 class GenreCreateListDestroyViewSet(CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = 'genres'
+    etag_namespaces = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    AsyncReadMixin,
+    ConditionalReadMixin,
+    CachedReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Title.objects.all()
+    cache_namespace = 'titles'
+    etag_namespaces = ('titles',)
     permission_classes = (IsAdminUserOrReadOnly,)
-    pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return queryset.select_related('category').prefetch_related(
+                'genre',
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
             return TitleReadOnlySerializer
         return TitleSerializer
 
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        names = get_facet_names(self.request)
+        if names:
+            response.data['facets'] = get_facets(
+                self.filter_queryset(self.get_queryset()), names, self.request,
+            )
+        return response
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(
+    AsyncReadMixin,
+    NestedViewSetMixin,
+    ConditionalReadMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ReviewSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = KeysetPagination
 
-    @property
-    def title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def get_etag_namespaces(self):
+        return (
+            'authors', 'reviews', f'reviews:{self.kwargs.get("title_id")}',
+        )
+
+    def get_parent_queryset(self):
+        queryset = Title.objects.filter(id=self.kwargs.get('title_id'))
+        if self.request.method == 'POST':
+            return queryset.annotate(
+                has_user_review=Exists(
+                    Review.objects.filter(
+                        title=OuterRef('pk'),
+                        author=self.request.user,
+                    )
+                )
+            )
+        return queryset
 
     def get_queryset(self):
-        return self.title.reviews.all()
+        queryset = Review.objects.filter(title_id=self.kwargs.get('title_id'))
+        if self.action == 'destroy':
+            return queryset.only('id', 'score', 'title_id', 'author')
+        return queryset.select_related('author').only(
+            'id',
+            'text',
+            'score',
+            'pub_date',
+            'title_id',
+            'author',
+            'author__username',
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'create':
+            context['title'] = self.parent
+        return context
 
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user,
-            title=self.title,
+            title=self.parent,
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    NestedViewSetMixin, ConditionalReadMixin, viewsets.ModelViewSet,
+):
     serializer_class = CommentSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = KeysetPagination
 
-    @property
-    def review_for_comment(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    def get_etag_namespaces(self):
+        return (
+            'authors', 'comments',
+            f'comments:{self.kwargs.get("review_id")}',
+        )
+
+    def get_parent_queryset(self):
+        return Review.objects.filter(
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+        )
 
     def get_queryset(self):
-        return self.review_for_comment.comments.all()
+        queryset = Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        )
+        if self.action == 'destroy':
+            return queryset.only('id', 'review_id', 'author')
+        return queryset.select_related('author').only(
+            'id',
+            'text',
+            'pub_date',
+            'review_id',
+            'author',
+            'author__username',
+        )
 
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user,
-            review=self.review_for_comment,
+            review=self.parent,
         )
@@ -0,0 +1,23 @@
+class HealthCheckMixin:
+    """Проверка соединения перед первым запросом к БД в рамках запроса.
+
+    При CONN_MAX_AGE > 0 соединение может быть закрыто сервером или пулом,
+    пока оно простаивало. С HEALTH_CHECKS такое соединение заменяется новым
+    до выполнения запроса, а не приводит к ошибке.
+    """
+
+    health_check_needed = False
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None and self.settings_dict.get(
+            'HEALTH_CHECKS'
+        ):
+            self.health_check_needed = True
+
+    def ensure_connection(self):
+        if self.health_check_needed and not self.in_atomic_block:
+            self.health_check_needed = False
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -0,0 +1,58 @@
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+
+class PathScopedMiddleware:
+    """Запускает SCOPED_MIDDLEWARE только для SCOPED_MIDDLEWARE_PATHS.
+
+    API работает только с JWT, поэтому сессии, CSRF, сообщения и
+    X-Frame-Options нужны лишь админке и документации. Остальные запросы
+    сразу передаются дальше по цепочке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        self.paths = tuple(settings.SCOPED_MIDDLEWARE_PATHS)
+        self.middleware = []
+        handler = get_response
+        for middleware_path in reversed(settings.SCOPED_MIDDLEWARE):
+            middleware = import_string(middleware_path)(handler)
+            self.middleware.insert(0, middleware)
+            handler = convert_exception_to_response(middleware)
+        self.scoped_response = handler
+
+    def in_scope(self, request):
+        return request.path_info.startswith(self.paths)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if self.in_scope(request):
+            return self.scoped_response(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.in_scope(request):
+            return await self.scoped_response(request)
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Django вызывает process_view только у внешних middleware."""
+        if not self.in_scope(request):
+            return None
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_view'):
+                response = middleware.process_view(
+                    request, view_func, view_args, view_kwargs,
+                )
+                if response is not None:
+                    return response
+        return None
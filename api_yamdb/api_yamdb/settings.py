@@ -4,6 +4,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from api_yamdb.database import parse_database_url
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 DOTENV_PATH = BASE_DIR / 'api_yamdb' / '.env'
@@ -37,14 +39,26 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'api_yamdb.middleware.PathScopedMiddleware',
+]
+
+SCOPED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+SCOPED_MIDDLEWARE_PATHS = ('/admin/', '/redoc/')
+
+# Админка ищет эти middleware в MIDDLEWARE, а они подключаются через
+# PathScopedMiddleware.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+ASYNC_CATALOG_VIEWS = os.getenv('ASYNC_CATALOG_VIEWS') == 'True'
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -68,12 +82,36 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 DATABASES = {
+    'default': parse_database_url(
+        os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3'), BASE_DIR,
+    ),
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_yamdb'),
     },
 }
 
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+# Время жизни версий данных. Процесс, не увидевший изменения (например, при
+# кэше в памяти каждого процесса), отдаёт устаревшие ответы, ETag и индексы
+# не дольше этого срока. 0 - версии не истекают, только для общего кэша.
+API_VERSION_TIMEOUT = int(os.getenv('API_VERSION_TIMEOUT', 60))
+# Через сколько секунд индексы в памяти процесса (подсказки, фильтр по
+# жанрам) перестраиваются, даже если версия в кэше не менялась. 0 - только
+# по версии, для общего кэша.
+LOCAL_INDEX_TIMEOUT = int(os.getenv('LOCAL_INDEX_TIMEOUT', 60))
+
+# Сколько id произведений фильтр по жанрам и категориям передаёт в IN;
+# при большем числе совпадений фильтрация выполняется подзапросами в БД.
+TITLE_FILTER_MAX_IDS = int(os.getenv('TITLE_FILTER_MAX_IDS', 5000))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,9 +141,16 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
+# Пользователь из утверждений токена без запроса к БД. Отзыв токенов при
+# смене роли доходит до процессов без общего кэша за
+# AUTH_TOKEN_VERSION_TIMEOUT секунд.
+AUTH_TOKEN_CLAIMS = os.getenv('AUTH_TOKEN_CLAIMS') == 'True'
+AUTH_TOKEN_VERSION_TIMEOUT = int(os.getenv('AUTH_TOKEN_VERSION_TIMEOUT', 10))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication' if AUTH_TOKEN_CLAIMS
+        else 'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -119,12 +164,22 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 4096))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 30))
+
+CONFIRMATION_CODE_TIMEOUT = 60 * 60 * 24
+
 EMAIL_HOST = 'smtp.mail.com'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
+EMAIL_OUTBOX_EAGER = os.getenv('EMAIL_OUTBOX_EAGER') == 'True'
+EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'True') == 'True'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
 MAX_LENGTH = 256
 MAX_LENGTH_NAME = 150
 
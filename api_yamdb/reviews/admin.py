@@ -1,6 +1,18 @@
-from django.contrib import admin
+import time
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from django.conf import settings
+from django.contrib import admin, messages
+
+from reviews.confirmation import resend_confirmation_codes
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingEmail,
+    Review,
+    Title,
+    User,
+)
 
 
 @admin.register(Category)
@@ -24,8 +36,42 @@ class TitleAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'created', 'attempts', 'sent')
+    list_filter = ('sent',)
+    search_fields = ('to',)
+    empty_value_display = '-пусто-'
+
+
+@admin.action(description='Отправить коды подтверждения')
+def resend_codes(modeladmin, request, queryset):
+    started = time.monotonic()
+    sent, failed = resend_confirmation_codes(
+        queryset, settings.EMAIL_OUTBOX_BATCH_SIZE,
+    )
+    elapsed = time.monotonic() - started
+    modeladmin.message_user(
+        request,
+        f'Отправлено писем: {sent} ({sent / max(elapsed, 1e-9):.0f} писем/с), '
+        f'не отправлено: {failed}.',
+        level=messages.WARNING if failed else messages.INFO,
+    )
+
+
+class UserAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        if change and {'role', 'is_staff', 'is_active'} & set(
+            form.changed_data
+        ):
+            obj.token_version += 1
+        super().save_model(request, obj, form, change)
+
+
 admin.site.register(
     User,
+    UserAdmin,
+    actions=(resend_codes,),
     list_display=(
         'username',
         'email',
@@ -33,7 +79,6 @@ admin.site.register(
         'bio',
         'first_name',
         'last_name',
-        'confirmation_code',
     ),
     search_fields=(
         'username',
@@ -0,0 +1,63 @@
+from itertools import islice
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+
+from reviews.tokens import confirmation_code_generator
+
+SUBJECT = 'Код подтверждения для доступа к API!'
+
+
+def confirmation_body(user):
+    return (
+        f'Здравствуйте, {user.username}.'
+        '\nКод подтверждения для доступа к API: '
+        f'{confirmation_code_generator.make_token(user)}'
+    )
+
+
+def invalidate_codes(users):
+    """Делает недействительными выданные пользователям коды."""
+    return users.update(
+        confirmation_code_version=F('confirmation_code_version') + 1,
+    )
+
+
+def resend_confirmation_codes(users, batch_size, on_batch=None):
+    """Выдаёт пользователям новые коды и рассылает их пачками.
+
+    Все письма уходят через одно соединение с почтовым сервером. После
+    каждой пачки вызывается on_batch(sent, error) с числом отправленных на
+    этот момент писем. Если пачку отправить не удалось, соединение
+    открывается заново и рассылка продолжается. Возвращает число
+    отправленных и неотправленных писем.
+    """
+    invalidate_codes(users)
+    users = users.only(
+        'id', 'username', 'email', 'confirmation_code_version',
+    ).iterator(chunk_size=batch_size)
+    sent = failed = 0
+    with get_connection() as connection:
+        while True:
+            batch = list(islice(users, batch_size))
+            if not batch:
+                return sent, failed
+            error = None
+            try:
+                sent += connection.send_messages([
+                    EmailMessage(
+                        subject=SUBJECT,
+                        body=confirmation_body(user),
+                        to=[user.email],
+                        connection=connection,
+                    )
+                    for user in batch
+                ]) or 0
+            except Exception as batch_error:
+                error = batch_error
+                failed += len(batch)
+            if on_batch is not None:
+                on_batch(sent, error)
+            if error is not None:
+                connection.close()
+                connection.open()
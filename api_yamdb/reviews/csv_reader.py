@@ -0,0 +1,46 @@
+"""Чтение csv файлов для импорта.
+
+Модуль не импортирует Django, поэтому его функции можно запускать в
+отдельных процессах без настройки проекта.
+"""
+import csv
+from itertools import islice
+
+
+def read_chunks(file_path, chunk_size, skip=0):
+    """Читает csv файл порциями по chunk_size строк, пропуская первые skip."""
+    with open(file_path, encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        for _ in islice(reader, skip):
+            pass
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def stream_file(file_path, chunk_size, skip, queue):
+    """Передаёт порции csv файла в очередь и завершает её значением None.
+
+    Очередь ограничена: процесс ждёт, пока загрузчик заберёт порции, поэтому
+    в памяти не накапливается весь файл. Ошибка чтения передаётся через ту
+    же очередь.
+    """
+    try:
+        for chunk in read_chunks(file_path, chunk_size, skip):
+            queue.put(chunk)
+    except Exception as error:
+        queue.put(error)
+    queue.put(None)
+
+
+def read_queue(queue):
+    """Порции из очереди, заполняемой stream_file."""
+    while True:
+        chunk = queue.get()
+        if chunk is None:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
@@ -1,108 +1,277 @@
-import csv
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from graphlib import TopologicalSorter
+from multiprocessing import Manager
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.shortcuts import get_object_or_404
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from api.cache import bump_version
+from reviews.csv_reader import read_chunks, read_queue, stream_file
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
+GenreTitle = Title.genre.through
+
+Dataset = namedtuple(
+    'Dataset', ('file_name', 'model', 'depends_on', 'verbose_name')
+)
+
+DATASETS = {
+    'category': Dataset('category.csv', Category, (), 'категорий'),
+    'genre': Dataset('genre.csv', Genre, (), 'жанров'),
+    'titles': Dataset('titles.csv', Title, ('category',), 'произведений'),
+    'genre_title': Dataset(
+        'genre_title.csv',
+        GenreTitle,
+        ('titles', 'genre'),
+        'жанров произведений',
+    ),
+    'users': Dataset('users.csv', User, (), 'пользователей'),
+    'review': Dataset('review.csv', Review, ('titles', 'users'), 'отзывов'),
+    'comments': Dataset(
+        'comments.csv', Comment, ('review', 'users'), 'комментариев'
+    ),
+}
+
 
 class Command(BaseCommand):
     help = 'Выполнить импорт данных из csv файла'
 
-    def handle(self, *args, **kwargs):
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'category.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                obj, created = Category.objects.get_or_create(
-                    id=row[0],
-                    name=row[1],
-                    slug=row[2],
-                )
-            print('Данные категорий загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'genre.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                obj, created = Genre.objects.get_or_create(
-                    id=row[0],
-                    name=row[1],
-                    slug=row[2],
-                )
-            print('Данные жанров загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'titles.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                obj, created = Title.objects.get_or_create(
-                    id=row[0],
-                    name=row[1],
-                    year=row[2],
-                    category_id=row[3],
-                )
-            print('Данные произведений загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'genre_title.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                genre_list = []
-                obj_genre = get_object_or_404(Genre, id=row[2])
-                genre_list.append(obj_genre)
-                obj, created = Title.objects.get_or_create(
-                    id=row[1],
-                )
-                try:
-                    genre_list.append(obj.genre.get())
-                except Exception:
-                    pass
-                obj.genre.set(genre_list)
-            print('Данные жанров произведений загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'users.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                obj, created = User.objects.get_or_create(
-                    id=row[0],
-                    username=row[1],
-                    email=row[2],
-                    role=row[3],
-                    bio=row[4],
-                    first_name=row[5],
-                    last_name=row[6],
-                )
-            print('Данные пользователей загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'review.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                user = get_object_or_404(User, id=row[3])
-                obj, created = Review.objects.get_or_create(
-                    id=row[0],
-                    title_id=row[1],
-                    text=row[2],
-                    author=user,
-                    score=row[4],
-                    pub_date=row[5],
-                )
-            print('Данные отзывов загружены в БД!')
-        file_path = settings.STATICFILES_DIRS[0] / 'data' / 'comments.csv'
-        with open(file_path, encoding='utf-8') as csv_file:
-            reader_object = csv.reader(csv_file)
-            next(reader_object)
-            for row in reader_object:
-                user = get_object_or_404(User, id=row[3])
-                obj, created = Comment.objects.get_or_create(
-                    id=row[0],
-                    review_id=row[1],
-                    text=row[2],
-                    author=user,
-                    pub_date=row[4],
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Количество строк, записываемых в БД одной транзакцией',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов для разбора csv файлов',
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=4,
+            help=(
+                'Сколько разобранных порций каждого файла может ждать записи '
+                'в БД'
+            ),
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=DATASETS,
+            metavar='DATASET',
+            help='Загрузить только указанные наборы данных',
+        )
+        parser.add_argument(
+            '--resume-from',
+            metavar='DATASET[:ROW]',
+            help='Продолжить импорт с указанного набора данных и строки',
+        )
+
+    def handle(self, *args, **options):
+        self.ids = {}
+        self.data_dir = settings.STATICFILES_DIRS[0] / 'data'
+        self.chunk_size = options['chunk_size']
+        self.verbosity = options['verbosity']
+        order = self.get_order(options['only'])
+        # При продолжении отзывы могли быть записаны прерванным запуском,
+        # поэтому рейтинги пересчитываются, если они входят в весь импорт.
+        recalculate_rating = 'review' in order
+        starts = dict.fromkeys(order, 0)
+        if options['resume_from']:
+            order, skip = self.resume(order, options['resume_from'])
+            starts[order[0]] = skip
+        started = time.monotonic()
+        try:
+            total_rows = self.load_all(
+                order, starts, options['workers'], options['queue_size'],
+            )
+        finally:
+            # bulk_create не отправляет сигналы, поэтому рейтинги и версии
+            # обновляются и после ошибки: записанные порции уже в БД.
+            self.finish(recalculate_rating)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Импорт завершён: {total_rows} строк за {elapsed:.2f} с '
+            f'({total_rows / max(elapsed, 1e-9):.0f} строк/с).'
+        )
+
+    def load_all(self, order, starts, workers, queue_size):
+        total_rows = 0
+        workers = min(workers, len(order))
+        if workers > 1:
+            # Менеджер закрывается раньше пула: если загрузка прервётся,
+            # процессы, ждущие места в очереди, получат ошибку и завершатся.
+            with ProcessPoolExecutor(max_workers=workers) as pool, (
+                Manager()
+            ) as manager:
+                queues = {
+                    name: manager.Queue(max(queue_size, 1)) for name in order
+                }
+                for name in order:
+                    pool.submit(
+                        stream_file,
+                        self.data_dir / DATASETS[name].file_name,
+                        self.chunk_size,
+                        starts[name],
+                        queues[name],
+                    )
+                for name in order:
+                    total_rows += self.load(
+                        name, read_queue(queues[name]), starts[name],
+                    )
+        else:
+            for name in order:
+                total_rows += self.load(
+                    name,
+                    read_chunks(
+                        self.data_dir / DATASETS[name].file_name,
+                        self.chunk_size,
+                        starts[name],
+                    ),
+                    starts[name],
                 )
-            print('Данные комментариев загружены в БД!')
+        return total_rows
+
+    def finish(self, recalculate_rating):
+        if recalculate_rating:
+            Title.objects.recalculate_rating()
+        # Общие версии `reviews` и `comments` сбрасывают ETag всех списков
+        # отзывов и комментариев.
+        bump_version(
+            'categories', 'genres', 'titles', 'users', 'authors', 'reviews',
+            'comments', 'suggest:categories', 'suggest:genres',
+            'suggest:titles', 'membership',
+        )
+
+    def get_order(self, only):
+        """Порядок записи наборов данных с учётом их зависимостей."""
+        order = TopologicalSorter(
+            {name: dataset.depends_on for name, dataset in DATASETS.items()}
+        ).static_order()
+        if only:
+            return [name for name in order if name in only]
+        return list(order)
+
+    def resume(self, order, resume_from):
+        name, _, row = resume_from.partition(':')
+        if name not in order:
+            raise CommandError(
+                f'Набор данных {name} не входит в импорт: {", ".join(order)}.'
+            )
+        if row and not row.isdigit():
+            raise CommandError(f'Неверный номер строки: {row}.')
+        return order[order.index(name):], int(row or 0)
+
+    def load(self, name, chunks, start):
+        dataset = DATASETS[name]
+        build = getattr(self, f'build_{name}')
+        rows = skipped = 0
+        started = time.monotonic()
+        for chunk in chunks:
+            objs = [obj for obj in map(build, chunk) if obj is not None]
+            try:
+                with transaction.atomic():
+                    dataset.model.objects.bulk_create(
+                        objs, ignore_conflicts=True,
+                    )
+            except Exception as error:
+                raise CommandError(
+                    f'Импорт прерван: {error}. Для продолжения запустите '
+                    f'команду с --resume-from {name}:{start + rows}'
+                ) from error
+            rows += len(chunk)
+            skipped += len(chunk) - len(objs)
+            if self.verbosity > 1:
+                self.stdout.write(f'{name}:{start + rows}')
+        self.ids.pop(dataset.model, None)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Данные {dataset.verbose_name} загружены в БД: {rows} строк, '
+            f'пропущено {skipped}, {rows / max(elapsed, 1e-9):.0f} строк/с.'
+        )
+        return rows
+
+    def get_ids(self, model):
+        """Множество id уже сохранённых объектов для проверки связей."""
+        if model not in self.ids:
+            self.ids[model] = set(model.objects.values_list('id', flat=True))
+        return self.ids[model]
+
+    def build_category(self, row):
+        return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_titles(self, row):
+        category_id = int(row['category']) if row['category'] else None
+        if category_id not in self.get_ids(Category):
+            category_id = None
+        return Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            category_id=category_id,
+        )
+
+    def build_genre_title(self, row):
+        title_id = int(row['title_id'])
+        genre_id = int(row['genre_id'])
+        if (
+            title_id not in self.get_ids(Title)
+            or genre_id not in self.get_ids(Genre)
+        ):
+            return None
+        return GenreTitle(title_id=title_id, genre_id=genre_id)
+
+    def build_users(self, row):
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            role=row['role'],
+            bio=row['bio'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+        )
+
+    def build_review(self, row):
+        title_id = int(row['title_id'])
+        author_id = int(row['author'])
+        if (
+            title_id not in self.get_ids(Title)
+            or author_id not in self.get_ids(User)
+        ):
+            return None
+        return Review(
+            id=row['id'],
+            title_id=title_id,
+            text=row['text'],
+            author_id=author_id,
+            score=row['score'],
+            pub_date=row['pub_date'],
+        )
+
+    def build_comments(self, row):
+        review_id = int(row['review_id'])
+        author_id = int(row['author'])
+        if (
+            review_id not in self.get_ids(Review)
+            or author_id not in self.get_ids(User)
+        ):
+            return None
+        return Comment(
+            id=row['id'],
+            review_id=review_id,
+            text=row['text'],
+            author_id=author_id,
+            pub_date=row['pub_date'],
+        )
@@ -0,0 +1,82 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.confirmation import resend_confirmation_codes
+from reviews.models import ROLE_CHOICES, User
+
+
+class Command(BaseCommand):
+    help = 'Выдать новые коды подтверждения и отправить их пользователям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            nargs='+',
+            help='Только пользователи с указанными именами',
+        )
+        parser.add_argument(
+            '--role',
+            choices=[role for role, _ in ROLE_CHOICES],
+            help='Только пользователи с указанной ролью',
+        )
+        parser.add_argument(
+            '--joined-after',
+            type=date.fromisoformat,
+            metavar='YYYY-MM-DD',
+            help='Только пользователи, зарегистрированные после даты',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Отправить коды всем пользователям',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем в одной пачке',
+        )
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['username']:
+            filters['username__in'] = options['username']
+        if options['role']:
+            filters['role'] = options['role']
+        if options['joined_after']:
+            filters['date_joined__date__gt'] = options['joined_after']
+        if not filters and not options['all']:
+            raise CommandError(
+                'Укажите фильтр пользователей или --all для отправки всем.'
+            )
+        self.sent = 0
+        started = time.monotonic()
+        try:
+            sent, failed = resend_confirmation_codes(
+                User.objects.filter(**filters),
+                options['batch_size'],
+                on_batch=self.batch_sent,
+            )
+        except Exception as error:
+            raise CommandError(
+                f'Рассылка прервана: {error}. Отправлено писем: {self.sent}.'
+            ) from error
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Отправлено писем: {sent} за {elapsed:.2f} с '
+            f'({sent / max(elapsed, 1e-9):.0f} писем/с), '
+            f'не отправлено: {failed}.'
+        )
+        if failed:
+            raise CommandError(f'Не удалось отправить писем: {failed}.')
+
+    def batch_sent(self, sent, error):
+        self.sent = sent
+        if error is not None:
+            self.stderr.write(
+                f'Ошибка отправки пачки: {error}. '
+                f'Уже отправлено писем: {sent}.'
+            )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправить письма из очереди исходящих писем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Количество писем, отправляемых через одно соединение',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        sent, failed = deliver_pending(options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Отправлено писем: {sent}, с ошибкой: {failed} '
+            f'({sent / max(elapsed, 1e-9):.0f} писем/с).'
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 17:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=256, verbose_name='тема')),
+                ('body', models.TextField(verbose_name='текст')),
+                ('to', models.EmailField(max_length=254, verbose_name='получатель')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+                ('next_attempt', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='следующая попытка')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='отправлено')),
+            ],
+            options={
+                'verbose_name': 'исходящее письмо',
+                'verbose_name_plural': 'исходящие письма',
+                'ordering': ('next_attempt',),
+            },
+        ),
+    ]
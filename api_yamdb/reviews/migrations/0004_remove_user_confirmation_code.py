@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 17:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='confirmation_code',
+        ),
+    ]
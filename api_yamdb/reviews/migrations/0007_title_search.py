@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import reviews.models
+from reviews import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor.connection)
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearchIndex',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='reviews.title')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('document', reviews.models.FullTextField(db_column='reviews_title_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_code_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='версия кодов подтверждения'),
+        ),
+    ]
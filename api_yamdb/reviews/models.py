@@ -1,8 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from reviews.tokens import confirmation_code_generator
 from reviews.validators import validate_username
 
 from api_yamdb.settings import MAX_LENGTH, MAX_LENGTH_NAME
@@ -48,18 +52,75 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_NAME,
         blank=True
     )
-    confirmation_code = models.CharField(
-        'код подтверждения',
-        max_length=255,
-        null=True,
-        blank=False,
-        default='XXXX',
+    token_version = models.PositiveIntegerField(
+        'версия токенов',
+        default=0,
+        editable=False,
+    )
+    confirmation_code_version = models.PositiveIntegerField(
+        'версия кодов подтверждения',
+        default=0,
+        editable=False,
     )
 
+    # Функция (user, fields), заполняющая отложенные поля вместо запроса.
+    deferred_loader = None
+    # Имя пользователя на момент загрузки из БД.
+    saved_username = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user.saved_username = user.__dict__.get('username')
+        return user
+
+    @property
+    def username_changed(self):
+        """Отличается ли имя от загруженного из БД.
+
+        Для объекта, созданного не из БД, изменение не исключить.
+        """
+        if 'username' in self.get_deferred_fields():
+            return False
+        return self.username != self.saved_username
+
     def validate_confirmation_code(self, value):
-        if value != self.confirmation_code:
+        if not confirmation_code_generator.check_token(self, value):
             raise ValidationError('Неверный код подтверждения!')
 
+    def use_confirmation_code(self, value):
+        """Проверяет код и делает его недействительным.
+
+        Версия кодов меняется условным UPDATE, поэтому один код нельзя
+        обменять на токен дважды, даже в параллельных запросах.
+        """
+        self.validate_confirmation_code(value)
+        self.last_login = timezone.now()
+        if not User.objects.filter(
+            pk=self.pk,
+            confirmation_code_version=self.confirmation_code_version,
+        ).update(
+            confirmation_code_version=F('confirmation_code_version') + 1,
+            last_login=self.last_login,
+        ):
+            raise ValidationError('Неверный код подтверждения!')
+        self.confirmation_code_version += 1
+
+    def refresh_from_db(self, using=None, fields=None):
+        """Загружает все отложенные поля одним запросом.
+
+        Без этого каждое обращение к отложенному полю выполняет отдельный
+        запрос к БД. Если задан `deferred_loader`, отложенные поля берутся
+        из него, а не из БД.
+        """
+        deferred = self.get_deferred_fields()
+        if fields and deferred.issuperset(fields):
+            if self.deferred_loader is not None:
+                self.deferred_loader(self, deferred)
+                return
+            fields = deferred
+        super().refresh_from_db(using, fields)
+
     @property
     def is_user(self):
         return self.role == USER
@@ -107,6 +168,22 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    def recalculate_rating(self):
+        """Пересчитывает сохранённый рейтинг по отзывам одним UPDATE."""
+        reviews = Review.objects.filter(title=OuterRef('pk')).values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0,
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0,
+            ),
+        )
+
+
 class Title(models.Model):
     name = models.CharField('название произведения', max_length=MAX_LENGTH)
     year = models.IntegerField('год выпуска')
@@ -122,16 +199,74 @@ class Title(models.Model):
         blank=True,
         null=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        'сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        'количество оценок',
+        default=0,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-year', 'name')
         default_related_name = 'titles'
         verbose_name = 'произведение'
         verbose_name_plural = 'произведения'
+        indexes = (
+            models.Index(fields=('-year', 'name'), name='title_year_name_idx'),
+            models.Index(fields=('name',), name='title_name_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class FullTextField(models.TextField):
+    """Скрытый столбец таблицы FTS5 с именем самой таблицы."""
+
+
+FullTextField.register_lookup(Match)
+
+
+class TitleSearchIndex(models.Model):
+    """Таблица полнотекстового индекса SQLite, см. reviews.search."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    name = models.TextField()
+    description = models.TextField()
+    document = FullTextField(db_column='reviews_title_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_title_fts'
+
 
 class Review(models.Model):
     author = author = models.ForeignKey(
@@ -163,6 +298,12 @@ class Review(models.Model):
         default_related_name = 'reviews'
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date'),
+                name='review_title_pub_date_idx',
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -197,3 +338,32 @@ class Comment(models.Model):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField('тема', max_length=MAX_LENGTH)
+    body = models.TextField('текст')
+    to = models.EmailField('получатель', max_length=254)
+    created = models.DateTimeField('создано', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'следующая попытка',
+        default=timezone.now,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    sent = models.DateTimeField('отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('next_attempt',)
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,142 @@
+"""Очередь исходящих писем.
+
+Письмо сохраняется в таблицу `OutgoingEmail` и отправляется фоновым
+потоком или командой `manage.py sendoutbox`, поэтому запрос не ждёт
+SMTP-сервер. Письма отправляются пачками через одно соединение, неудачные
+попытки повторяются с экспоненциально растущей задержкой.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject, body, to):
+    email = OutgoingEmail.objects.create(subject=subject, body=body, to=to)
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(deliver_pending)
+    elif settings.EMAIL_OUTBOX_WORKER:
+        transaction.on_commit(worker.wake)
+    return email
+
+
+def claim_batch(batch_size, ready_at):
+    """Забирает письма, готовые к отправке на момент ready_at.
+
+    Следующая попытка сразу откладывается, это работает как аренда: если
+    процесс упадёт во время отправки, письма снова станут доступны после
+    задержки. Письмо считается захваченным, только если условный UPDATE по
+    прежнему числу попыток изменил строку, поэтому два процесса не отправят
+    одно письмо даже без SELECT ... FOR UPDATE (его нет в SQLite).
+    """
+    while True:
+        now = timezone.now()
+        candidates = list(OutgoingEmail.objects.filter(
+            sent__isnull=True,
+            next_attempt__lte=ready_at,
+            attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        )[:batch_size])
+        if not candidates:
+            return []
+        batch = []
+        with transaction.atomic():
+            for email in candidates:
+                attempts = email.attempts + 1
+                next_attempt = now + timedelta(
+                    seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+                    * 2 ** (attempts - 1)
+                )
+                if OutgoingEmail.objects.filter(
+                    pk=email.pk, attempts=email.attempts, sent__isnull=True,
+                ).update(attempts=attempts, next_attempt=next_attempt):
+                    email.attempts = attempts
+                    email.next_attempt = next_attempt
+                    batch.append(email)
+        if batch:
+            return batch
+
+
+def send_batch(batch, connection):
+    sent = []
+    failed = []
+    for email in batch:
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            to=[email.to],
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception as error:
+            email.last_error = str(error)
+            failed.append(email)
+        else:
+            email.sent = timezone.now()
+            sent.append(email)
+    OutgoingEmail.objects.bulk_update(sent, ('sent',))
+    OutgoingEmail.objects.bulk_update(failed, ('last_error',))
+    return len(sent), len(failed)
+
+
+def deliver_pending(batch_size=None):
+    """Отправляет все готовые письма и возвращает число успешных и ошибок."""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    total_sent = total_failed = 0
+    started = timezone.now()
+    connection = get_connection()
+    while True:
+        batch = claim_batch(batch_size, started)
+        if not batch:
+            break
+        try:
+            with connection:
+                sent, failed = send_batch(batch, connection)
+        except Exception as error:
+            for email in batch:
+                email.last_error = str(error)
+            OutgoingEmail.objects.bulk_update(batch, ('last_error',))
+            sent, failed = 0, len(batch)
+        total_sent += sent
+        total_failed += failed
+    return total_sent, total_failed
+
+
+class OutboxWorker:
+    """Фоновый поток, отправляющий письма из очереди."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def wake(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='email-outbox', daemon=True,
+                )
+                self.thread.start()
+        self.event.set()
+
+    def run(self):
+        while True:
+            self.event.wait(settings.EMAIL_OUTBOX_RETRY_DELAY)
+            self.event.clear()
+            try:
+                deliver_pending()
+            except Exception:
+                logger.exception('Ошибка отправки писем из очереди')
+            finally:
+                close_old_connections()
+
+
+worker = OutboxWorker()
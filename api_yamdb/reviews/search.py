@@ -0,0 +1,125 @@
+"""Полнотекстовый поиск произведений.
+
+В SQLite индекс хранится в таблице FTS5 `reviews_title_fts` (модель
+`TitleSearchIndex`, присоединяется к произведениям по rowid), в PostgreSQL -
+в вычисляемом столбце `reviews_title.search_vector` с индексом GIN. Индекс
+обновляется самой БД (триггерами или вычисляемым столбцом), поэтому
+учитывает и `bulk_create`, и `update()`, и удаление без сигналов.
+Название весит больше описания, результаты сортируются по релевантности.
+"""
+import re
+
+from django.db.models import BooleanField, F, FloatField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+
+SQLITE_INSTALL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, description, tokenize = 'unicode61 remove_diacritics 2')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+    'AFTER INSERT ON reviews_title BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    'AFTER UPDATE OF name, description ON reviews_title BEGIN '
+    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; '
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+    'AFTER DELETE ON reviews_title BEGIN '
+    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END',
+)
+
+SQLITE_REBUILD = (
+    f'DELETE FROM {FTS_TABLE}',
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    'SELECT id, name, description FROM reviews_title',
+)
+
+SQLITE_UNINSTALL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE reviews_title ADD COLUMN IF NOT EXISTS search_vector '
+    'tsvector GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    ') STORED',
+    'CREATE INDEX IF NOT EXISTS reviews_title_search_idx '
+    'ON reviews_title USING GIN (search_vector)',
+)
+
+POSTGRESQL_UNINSTALL = (
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+    'ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector',
+)
+
+
+def execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection):
+    """Создаёт индекс и триггеры, если их ещё нет."""
+    if connection.vendor == 'sqlite':
+        execute(connection, SQLITE_INSTALL)
+    elif connection.vendor == 'postgresql':
+        execute(connection, POSTGRESQL_INSTALL)
+
+
+def rebuild(connection):
+    """Заново заполняет индекс SQLite по таблице произведений."""
+    if connection.vendor == 'sqlite':
+        execute(connection, SQLITE_REBUILD)
+
+
+def uninstall(connection):
+    if connection.vendor == 'sqlite':
+        execute(connection, SQLITE_UNINSTALL)
+    elif connection.vendor == 'postgresql':
+        execute(connection, POSTGRESQL_UNINSTALL)
+
+
+def get_terms(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def search_titles(queryset, text, connection):
+    """Произведения, подходящие под запрос, от наиболее релевантных.
+
+    Последнее слово запроса ищется как префикс. Аннотация `search_rank`
+    меньше у более релевантных произведений.
+    """
+    terms = get_terms(text)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        query = ' & '.join([*terms[:-1], f'{terms[-1]}:*'])
+        return queryset.annotate(
+            search_match=RawSQL(
+                "reviews_title.search_vector @@ to_tsquery('simple', %s)",
+                (query,),
+                output_field=BooleanField(),
+            ),
+            search_rank=RawSQL(
+                "-ts_rank(reviews_title.search_vector, "
+                "to_tsquery('simple', %s))",
+                (query,),
+                output_field=FloatField(),
+            ),
+        ).filter(search_match=True).order_by('search_rank', 'id')
+    query = ' '.join(
+        [*(f'"{term}"' for term in terms[:-1]), f'"{terms[-1]}"*']
+    )
+    return queryset.filter(search_index__document__match=query).annotate(
+        search_rank=F('search_index__rank'),
+    ).order_by('search_rank', 'id')
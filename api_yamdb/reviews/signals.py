@@ -0,0 +1,64 @@
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_migrate,
+    post_save,
+)
+from django.dispatch import receiver
+
+from reviews import search
+from reviews.models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+def remember_score(instance):
+    """Запоминает оценку и произведение в том виде, как они лежат в БД."""
+    instance._saved_title_id = instance.__dict__.get('title_id')
+    instance._saved_score = instance.__dict__.get('score')
+
+
+@receiver(post_init, sender=Review)
+def review_loaded(sender, instance, **kwargs):
+    remember_score(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        change_rating(instance.title_id, instance.score, 1)
+    elif instance._saved_score is None:
+        Title.objects.filter(pk=instance.title_id).recalculate_rating()
+    elif instance._saved_title_id != instance.title_id:
+        change_rating(instance._saved_title_id, -instance._saved_score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif instance._saved_score != instance.score:
+        change_rating(
+            instance.title_id,
+            instance.score - instance._saved_score,
+            0,
+        )
+    remember_score(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_migrate)
+def restore_search(sender, using, **kwargs):
+    """Восстанавливает триггеры поиска.
+
+    SQLite пересоздаёт таблицу при изменении её столбцов, и триггеры
+    удаляются вместе со старой таблицей.
+    """
+    if sender.name == 'reviews':
+        search.install(connections[using])
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int
+
+
+class ConfirmationCodeGenerator(PasswordResetTokenGenerator):
+    """Коды подтверждения, подписанные SECRET_KEY.
+
+    Код содержит время выдачи и HMAC от данных пользователя, поэтому для
+    проверки не нужно хранить его в БД. Код действует
+    CONFIRMATION_CODE_TIMEOUT секунд и перестаёт подходить при смене имени
+    пользователя или почты, после обмена на токен и после выдачи нового кода:
+    оба события меняют `confirmation_code_version`.
+    """
+
+    key_salt = 'reviews.tokens.ConfirmationCodeGenerator'
+
+    def _make_hash_value(self, user, timestamp):
+        return (
+            f'{user.pk}{user.username}{user.email}'
+            f'{user.confirmation_code_version}{timestamp}'
+        )
+
+    def check_token(self, user, token):
+        if not (user and token):
+            return False
+        try:
+            ts_b36, _ = token.split('-')
+            ts = base36_to_int(ts_b36)
+        except ValueError:
+            return False
+        if not constant_time_compare(
+            self._make_token_with_timestamp(user, ts), token,
+        ):
+            return False
+        return (
+            self._num_seconds(self._now()) - ts
+            <= settings.CONFIRMATION_CODE_TIMEOUT
+        )
+
+
+confirmation_code_generator = ConfirmationCodeGenerator()
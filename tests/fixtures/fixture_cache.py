@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+from api.authentication import user_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """База очищается между тестами без сигналов, поэтому и кэш тоже."""
+    cache.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
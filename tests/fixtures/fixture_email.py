@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_email_outbox(settings):
+    """Письма отправляются сразу после записи в очередь, без фонового потока."""
+    settings.EMAIL_OUTBOX_EAGER = True
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['rating']
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 3)
+        review = create_single_review(
+            moderator_client, title_id, 'text', 8
+        ).json()
+        assert self.get_rating(admin_client, title_id) == 5.5, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'создания отзыва.'
+        )
+
+        moderator_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/',
+            data={'score': 10},
+        )
+        assert self.get_rating(admin_client, title_id) == 6.5, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'изменения оценки в отзыве.'
+        )
+
+        moderator_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+        )
+        assert self.get_rating(admin_client, title_id) == 3, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'удаления отзыва.'
+        )
+
+        user.delete()
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'удаления автора отзыва.'
+        )
+
+    def test_02_rating_without_review_queries(self, client, admin_client,
+                                              user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 7)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        ratings = {
+            title['id']: title['rating']
+            for title in response.json()['results']
+        }
+        assert ratings == {titles[0]['id']: 7, titles[1]['id']: None}
+        assert not [
+            query for query in context.captured_queries
+            if 'reviews_review' in query['sql']
+        ], (
+            'Проверьте, что рейтинг произведения читается из сохранённых '
+            'полей, без запросов к таблице отзывов.'
+        )
@@ -0,0 +1,192 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import get_access_token
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def create_catalog(size):
+    category = Category.objects.create(name='Фильм', slug='films')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre-{idx}') for idx in range(3)
+    )
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {idx}', year=2000, category=category)
+        for idx in range(size)
+    )
+    genres = list(Genre.objects.all())
+    titles = list(Title.objects.all())
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.id, genre_id=genre.id)
+        for title in titles
+        for genre in genres
+    )
+    return titles
+
+
+def create_authors(size):
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(size)
+    )
+    return list(User.objects.filter(username__startswith='author'))
+
+
+def table_queries(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries), response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Queries:
+
+    def test_01_titles_list_constant_queries(self, client):
+        create_catalog(500)
+        small, small_data = count_queries(client, '/api/v1/titles/?limit=10')
+        large, large_data = count_queries(client, '/api/v1/titles/?limit=500')
+        assert len(small_data['results']) == 10
+        assert len(large_data['results']) == 500
+        assert len(large_data['results'][0]['genre']) == 3
+        assert small == large, (
+            'Проверьте, что количество SQL-запросов при GET-запросе к '
+            '`/api/v1/titles/` не зависит от размера страницы.'
+        )
+
+    def test_02_title_detail_constant_queries(self, client):
+        titles = create_catalog(1)
+        queries, data = count_queries(
+            client, f'/api/v1/titles/{titles[0].id}/'
+        )
+        assert data['category']['slug'] == 'films'
+        assert queries == 2, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/{title_id}/` '
+            'загружает категорию вместе с произведением, а жанры - одним '
+            'запросом.'
+        )
+
+    def test_03_review_create_single_title_lookup(self, user_client, user):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'text', 'score': 5})
+        assert response.status_code == 201
+        assert len(table_queries(context, 'reviews_title')) == 1, (
+            'Проверьте, что при POST-запросе к '
+            '`/api/v1/titles/{title_id}/reviews/` произведение и наличие '
+            'отзыва пользователя проверяются одним запросом.'
+        )
+        response = user_client.post(url, data={'text': 'text', 'score': 5})
+        assert response.status_code == 400
+        assert Review.objects.count() == 1
+
+    def test_04_review_list_missing_title(self, client):
+        create_catalog(1)
+        response = client.get('/api/v1/titles/0/reviews/')
+        assert response.status_code == 404
+
+    def test_05_comment_parent_matches_title(self, client, user_client, user):
+        first, second = create_catalog(2)
+        review = Review.objects.create(
+            author=user, title=first, text='text', score=5
+        )
+        Comment.objects.create(author=user, review=review, text='text')
+        url = f'/api/v1/titles/{second.id}/reviews/{review.id}/comments/'
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/{review_id}/'
+            'comments/` возвращает 404, если отзыв относится к другому '
+            'произведению.'
+        )
+        assert user_client.post(url, data={'text': 'text'}).status_code == 404
+
+        url = f'/api/v1/titles/{first.id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'text'})
+        assert response.status_code == 201
+        assert len(table_queries(context, 'reviews_review')) == 1, (
+            'Проверьте, что при POST-запросе к `/api/v1/titles/{title_id}/'
+            'reviews/{review_id}/comments/` отзыв загружается один раз.'
+        )
+
+    def test_06_review_and_comment_lists_without_author_queries(self,
+                                                                client):
+        title = create_catalog(1)[0]
+        authors = create_authors(100)
+        Review.objects.bulk_create(
+            Review(author=author, title=title, text='text', score=5)
+            for author in authors
+        )
+        review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=author, review=review, text='text')
+            for author in authors
+        )
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/?limit=100',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?limit=100',
+        )
+        for url in urls:
+            queries, data = count_queries(client, url)
+            assert len(data['results']) == 100
+            assert {item['author'] for item in data['results']} == {
+                author.username for author in authors
+            }
+            assert queries == 2, (
+                f'Проверьте, что GET-запрос к `{url}` загружает авторов '
+                'вместе с объектами: ожидается два SQL-запроса.'
+            )
+
+    def test_07_detail_permissions_without_author_queries(self, user,
+                                                          moderator):
+        title = create_catalog(1)[0]
+        author, other = create_authors(2)
+        review = Review.objects.create(
+            author=author, title=title, text='text', score=5
+        )
+        comment = Comment.objects.create(
+            author=author, review=review, text='text'
+        )
+        clients = {}
+        for person in (author, other, moderator):
+            clients[person] = APIClient()
+            clients[person].credentials(
+                HTTP_AUTHORIZATION=f'Bearer {get_access_token(person)}'
+            )
+            clients[person].get('/api/v1/titles/')
+        review_url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        for url in (f'{review_url}comments/{comment.id}/', review_url):
+            response = clients[other].patch(url, data={'text': 'new'})
+            assert response.status_code == 403
+
+            with CaptureQueriesContext(connection) as context:
+                response = clients[author].patch(url, data={'text': 'new'})
+            assert response.status_code == 200
+            assert response.json()['author'] == author.username
+            assert not table_queries(context, 'reviews_user'), (
+                f'Проверьте, что PATCH-запрос к `{url}` не загружает '
+                'автора отдельным запросом.'
+            )
+
+            with CaptureQueriesContext(connection) as context:
+                response = clients[moderator].delete(url)
+            assert response.status_code == 204
+            assert not any(
+                '"reviews_user"' in query['sql']
+                for query in context.captured_queries
+            ), (
+                f'Проверьте, что DELETE-запрос к `{url}` не обращается к '
+                'таблице пользователей.'
+            )
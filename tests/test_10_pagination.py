@@ -0,0 +1,99 @@
+import base64
+import json
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Review, Title
+
+
+def walk_cursor(client, url):
+    results = []
+    response = client.get(url).json()
+    results.extend(response['results'])
+    while response['next']:
+        response = client.get(response['next']).json()
+        results.extend(response['results'])
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10KeysetPagination:
+
+    def test_01_titles_cursor_follows_ordering(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx % 3}', year=2000 + idx % 2)
+            for idx in range(25)
+        )
+        offset_page = client.get('/api/v1/titles/?limit=25').json()
+        cursor_results = walk_cursor(client, '/api/v1/titles/?cursor=&limit=4')
+        assert [title['id'] for title in cursor_results] == [
+            title['id'] for title in offset_page['results']
+        ], (
+            'Проверьте, что обход `/api/v1/titles/` по курсору возвращает '
+            'все произведения в порядке сортировки без повторов.'
+        )
+
+    def test_02_reviews_cursor_with_equal_dates(self, client, admin, user,
+                                                moderator):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        for author in (admin, user, moderator):
+            Review.objects.create(
+                author=author, title=title, text='text', score=5
+            )
+        Review.objects.update(pub_date=timezone.now())
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        cursor_results = walk_cursor(client, f'{url}?cursor=&limit=1')
+        assert sorted(review['id'] for review in cursor_results) == sorted(
+            Review.objects.values_list('id', flat=True)
+        ), (
+            'Проверьте, что курсор для `/api/v1/titles/{title_id}/reviews/` '
+            'различает отзывы с одинаковой датой публикации.'
+        )
+
+    def test_03_skip_count(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000) for idx in range(3)
+        )
+        for url in (
+            '/api/v1/titles/?count=false&limit=2',
+            '/api/v1/titles/?cursor=&count=false&limit=2',
+        ):
+            data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что параметр `count=false` отключает подсчёт '
+                'объектов.'
+            )
+            assert len(data['results']) == 2
+            assert data['next']
+            next_page = client.get(data['next']).json()
+            assert len(next_page['results']) == 1
+            assert next_page['next'] is None
+
+    def test_04_invalid_cursor(self, client):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('position', (
+        ['abc', 'x', 1],
+        [{'a': 1}, 'x', 1],
+        [2000, None, 1],
+        [2000, 'x', [1]],
+    ))
+    def test_05_cursor_with_wrong_types(self, client, position):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+        response = client.get(
+            '/api/v1/titles/', {'cursor': cursor.decode()},
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что курсор со значениями неверного типа '
+            'отклоняется с ошибкой 404, а не 500.'
+        )
+
+    def test_06_reviews_cursor_with_wrong_date(self, client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        cursor = base64.urlsafe_b64encode(json.dumps(['notadate', 1]).encode())
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/', {'cursor': cursor.decode()},
+        )
+        assert response.status_code == 404
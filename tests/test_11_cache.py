@@ -0,0 +1,92 @@
+import pytest
+from django.db import transaction
+from django.db.models.deletion import Collector
+
+from api.cache import get_version
+from reviews.models import Genre, OutgoingEmail, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    def test_01_anonymous_reads_are_cached(self, client, admin_client):
+        create_titles(admin_client)
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+        ):
+            first = client.get(url)
+            second = client.get(url)
+            assert first['X-Cache'] == 'MISS'
+            assert second['X-Cache'] == 'HIT', (
+                f'Проверьте, что повторный GET-запрос к `{url}` '
+                'отдаётся из кэша.'
+            )
+            assert first.json() == second.json()
+
+    def test_02_query_params_are_normalized(self, client, admin_client):
+        create_titles(admin_client)
+        client.get('/api/v1/titles/?year=1984&genre=horror')
+        response = client.get('/api/v1/titles/?genre=horror&year=1984')
+        assert response['X-Cache'] == 'HIT'
+
+    def test_03_changes_invalidate_cache(self, client, admin_client,
+                                         user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        create_single_review(user_client, titles[0]['id'], 'text', 6)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 6, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений.'
+        )
+
+        admin_client.patch(url, data={'genre': ['drama']})
+        assert client.get(url).json()['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+
+        admin_client.delete('/api/v1/categories/films/')
+        assert client.get(url).json()['category'] is None
+        assert len(client.get('/api/v1/categories/').json()['results']) == 1
+
+    def test_04_authenticated_reads_bypass_cache(self, admin_client):
+        admin_client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/genres/')
+        assert 'X-Cache' not in response
+
+    def test_05_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.json()['hit'] == 1
+        assert response.json()['miss'] == 1
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+
+    def test_06_versions_change_after_commit(self):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        before = get_version('genres')
+        with transaction.atomic():
+            genre.delete()
+            assert get_version('genres') == before, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции.'
+            )
+        assert get_version('genres') != before
+        before = get_version('genres')
+        with transaction.atomic():
+            Genre.objects.create(name='Комедия', slug='comedy')
+            transaction.set_rollback(True)
+        assert get_version('genres') == before
+
+    def test_07_fast_delete_kept(self):
+        collector = Collector(using='default')
+        for model in (OutgoingEmail, Title.genre.through):
+            assert collector.can_fast_delete(model.objects.all()), (
+                'Проверьте, что обработчики сигналов подключены только к '
+                f'нужным моделям и {model.__name__} удаляется без загрузки '
+                'строк.'
+            )
@@ -0,0 +1,135 @@
+import time
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title, User
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def test_01_etag_not_modified(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for url in (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+        ):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок `ETag`.'
+            )
+            assert response.has_header('Last-Modified')
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert response.status_code == 304, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+            assert not response.content
+
+    def test_02_changes_reset_etag(self, client, admin_client, admin,
+                                   user, user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        other_etag = client.get(other_url)['ETag']
+
+        create_single_review(user_client, titles[0]['id'], 'text', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет `ETag` списка отзывов '
+            'произведения.'
+        )
+        assert len(response.json()['results']) == 2
+        assert client.get(
+            other_url, HTTP_IF_NONE_MATCH=other_etag
+        ).status_code == 304
+
+        etag = response['ETag']
+        admin_client.patch(
+            f'{url}{reviews[0]["id"]}/', data={'text': 'new text'}
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_03_users_me_etag(self, user_client, admin_client):
+        response = user_client.get('/api/v1/users/me/')
+        etag = response['ETag']
+        assert user_client.get(
+            '/api/v1/users/me/', HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+        assert admin_client.get(
+            '/api/v1/users/me/', HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200, (
+            'Проверьте, что `ETag` для `/api/v1/users/me/` различается для '
+            'разных пользователей.'
+        )
+
+    def test_04_bulk_import_resets_etag(self, client):
+        call_command('importcsv', workers=1, only=['users'], verbosity=0)
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=User.objects.first(), text='text', score=5,
+        )
+        urls = (
+            f'/api/v1/titles/{title.pk}/reviews/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+        )
+        etags = [client.get(url)['ETag'] for url in urls]
+        Review.objects.bulk_create([Review(
+            title=title, author=User.objects.last(), text='text', score=1,
+        )])
+        Comment.objects.bulk_create([Comment(
+            review=review, author=User.objects.first(), text='text',
+        )])
+        call_command('importcsv', workers=1, only=['category'], verbosity=0)
+        for url, etag in zip(urls, etags):
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag,
+            ).status_code == 200, (
+                'Проверьте, что импорт из csv сбрасывает `ETag` списков '
+                'отзывов и комментариев.'
+            )
+
+    def test_05_versions_expire(self, client, settings):
+        settings.API_VERSION_TIMEOUT = 1
+        response = client.get('/api/v1/genres/')
+        time.sleep(1.1)
+        assert client.get(
+            '/api/v1/genres/', HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code == 200, (
+            'Проверьте, что версии данных живут не дольше '
+            '`API_VERSION_TIMEOUT` секунд.'
+        )
+
+    def test_06_author_names_reset_etag(self, client, user_client, user,
+                                        admin):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        Review.objects.create(title=title, author=user, text='text', score=5)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        User.objects.create_user(username='newcomer', email='new@yamdb.fake')
+        user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'new bio'}, format='json',
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что регистрация и изменение профиля без смены имени '
+            'не меняют `ETag` списков отзывов.'
+        )
+        user_client.patch(
+            '/api/v1/users/me/', data={'username': 'renamed'}, format='json',
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет `ETag` списков отзывов.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+        etag = response['ETag']
+        admin.delete()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,140 @@
+from smtplib import SMTPException
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import F
+
+from reviews.models import OutgoingEmail, User
+from reviews.outbox import claim_batch, deliver_pending, enqueue
+from reviews.tokens import confirmation_code_generator
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13EmailOutbox:
+
+    def test_01_signup_does_not_send_mail_inline(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_WORKER = False
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'valid@yamdb.fake', 'username': 'valid_username'},
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо ставится в очередь, а не '
+            'отправляется во время запроса.'
+        )
+        assert OutgoingEmail.objects.filter(to='valid@yamdb.fake').exists()
+
+        call_command('sendoutbox')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['valid@yamdb.fake']
+        assert OutgoingEmail.objects.get().sent is not None
+
+    def test_02_batches_share_connection(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_WORKER = False
+        for idx in range(5):
+            enqueue('subject', 'body', f'user{idx}@yamdb.fake')
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open'
+        ) as open_connection:
+            assert deliver_pending(batch_size=2) == (5, 0)
+        assert open_connection.call_count == 3
+        assert len(mail.outbox) == 5
+
+    def test_03_failed_mail_is_retried(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_WORKER = False
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0
+        enqueue('subject', 'body', 'user@yamdb.fake')
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=SMTPException('server is down'),
+        ):
+            assert deliver_pending() == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1
+        assert email.last_error == 'server is down'
+        assert deliver_pending() == (1, 0)
+        assert len(mail.outbox) == 1
+
+    def test_04_resend_codes(self, admin, user, moderator):
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open'
+        ) as open_connection:
+            call_command('resendcodes', '--all', '--batch-size', '2')
+        assert open_connection.call_count == 1, (
+            'Проверьте, что все письма с кодами отправляются через одно '
+            'соединение.'
+        )
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            (admin.email, user.email, moderator.email)
+        )
+        for message in mail.outbox:
+            person = User.objects.get(email=message.to[0])
+            code = message.body.rsplit(' ', 1)[-1]
+            assert confirmation_code_generator.check_token(person, code), (
+                'Проверьте, что в письме отправляется действующий код '
+                'подтверждения.'
+            )
+
+    def test_05_resend_codes_filters(self, admin, user):
+        call_command('resendcodes', '--role', 'admin')
+        assert [message.to for message in mail.outbox] == [[admin.email]]
+
+    def test_06_claimed_rows_are_not_sent_twice(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_WORKER = False
+        emails = [
+            enqueue('subject', 'body', f'user{idx}@yamdb.fake')
+            for idx in range(3)
+        ]
+        atomic = transaction.atomic
+
+        def claimed_by_other_process():
+            # Другой процесс успевает захватить письмо между выборкой
+            # кандидатов и их захватом.
+            OutgoingEmail.objects.filter(pk=emails[0].pk).update(
+                attempts=F('attempts') + 1,
+            )
+            return atomic()
+
+        with mock.patch(
+            'reviews.outbox.transaction.atomic',
+            side_effect=claimed_by_other_process,
+        ):
+            batch = claim_batch(10, emails[-1].next_attempt)
+        assert sorted(email.pk for email in batch) == [
+            emails[1].pk, emails[2].pk,
+        ], (
+            'Проверьте, что письмо, захваченное другим процессом, не '
+            'попадает в пачку для отправки.'
+        )
+
+    def test_07_resend_codes_arguments_and_failures(self, admin, user,
+                                                    moderator, capsys):
+        with pytest.raises(CommandError):
+            call_command('resendcodes', '--joined-after', '2024-13-01')
+        send_messages = mail.backends.locmem.EmailBackend.send_messages
+        calls = []
+
+        def fail_second_batch(backend, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise SMTPException('server is down')
+            return send_messages(backend, messages)
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            fail_second_batch,
+        ):
+            with pytest.raises(CommandError, match='Не удалось отправить'):
+                call_command('resendcodes', '--all', '--batch-size', '1')
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что ошибка в одной пачке не прерывает рассылку.'
+        )
+        assert 'Уже отправлено писем: 1.' in capsys.readouterr().err
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import User
+
+
+def signup(client, username='valid_username'):
+    response = client.post(
+        '/api/v1/auth/signup/',
+        data={'email': f'{username}@yamdb.fake', 'username': username},
+    )
+    assert response.status_code == 200
+    return mail.outbox[-1].body.rsplit(' ', 1)[-1]
+
+
+def user_query_types(context):
+    return [
+        query['sql'].split()[0] for query in context.captured_queries
+        if '"reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ConfirmationCode:
+    url_token = '/api/v1/auth/token/'
+
+    def test_01_code_from_email_gives_token(self, client):
+        code = signup(client)
+        response = client.post(
+            self.url_token,
+            data={'username': 'valid_username', 'confirmation_code': code},
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что код из письма позволяет получить токен.'
+        )
+        assert 'token' in response.json()
+
+    def test_02_signup_does_not_write_user(self, client):
+        signup(client)
+        with mock.patch.object(User, 'save') as save:
+            signup(client)
+        assert not save.called, (
+            'Проверьте, что при повторной регистрации код не сохраняется '
+            'в БД.'
+        )
+
+    def test_03_code_of_other_user_rejected(self, client):
+        code = signup(client, 'first_user')
+        signup(client, 'second_user')
+        response = client.post(
+            self.url_token,
+            data={'username': 'second_user', 'confirmation_code': code},
+        )
+        assert response.status_code == 400
+
+    def test_04_expired_code_rejected(self, client, settings):
+        code = signup(client)
+        settings.CONFIRMATION_CODE_TIMEOUT = 60
+        with mock.patch(
+            'reviews.tokens.ConfirmationCodeGenerator._now',
+            return_value=datetime.now() + timedelta(seconds=120),
+        ):
+            response = client.post(
+                self.url_token,
+                data={
+                    'username': 'valid_username',
+                    'confirmation_code': code,
+                },
+            )
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код подтверждения не принимается.'
+        )
+
+    def test_05_token_exchange_single_query(self, client):
+        code = signup(client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                self.url_token,
+                data={'username': 'valid_username', 'confirmation_code': code},
+            )
+        assert response.status_code == 200
+        assert [
+            query['sql'].split()[0] for query in context.captured_queries
+        ] == ['SELECT', 'UPDATE'], (
+            'Проверьте, что выдача токена выполняет один запрос на чтение '
+            'пользователя и один на погашение кода.'
+        )
+        assert '"reviews_user"."bio"' not in context.captured_queries[0][
+            'sql'
+        ], 'Проверьте, что при выдаче токена загружаются только нужные поля.'
+
+    def test_06_code_is_single_use(self, client):
+        old_code = signup(client)
+        code = signup(client)
+        data = {'username': 'valid_username', 'confirmation_code': old_code}
+        assert client.post(self.url_token, data=data).status_code == 400, (
+            'Проверьте, что повторная отправка кода делает недействительными '
+            'выданные раньше коды.'
+        )
+        data['confirmation_code'] = code
+        assert client.post(self.url_token, data=data).status_code == 200
+        assert client.post(self.url_token, data=data).status_code == 400, (
+            'Проверьте, что код нельзя обменять на токен повторно.'
+        )
+        assert User.objects.get(username='valid_username').last_login
+
+    def test_07_signup_queries(self, client):
+        with CaptureQueriesContext(connection) as context:
+            signup(client)
+        first = user_query_types(context)
+        assert first.count('INSERT') == 1 and 'UPDATE' not in first, (
+            'Проверьте, что при первой регистрации код не записывается в БД.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            code = signup(client)
+        again = user_query_types(context)
+        assert again.count('UPDATE') == 1 and again[-1] == 'UPDATE', (
+            'Проверьте, что повторная регистрация только увеличивает версию '
+            'кодов одним запросом, без повторного чтения пользователя.'
+        )
+        response = client.post(
+            self.url_token,
+            data={'username': 'valid_username', 'confirmation_code': code},
+        )
+        assert response.status_code == 200
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import (
+    ClaimsJWTAuthentication, get_access_token, get_token_version,
+    set_token_version, token_version_key,
+)
+from api.cache import get_cache
+
+
+def claims_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+    )
+    return client
+
+
+def authenticate(token):
+    request = APIRequestFactory().get(
+        '/api/v1/titles/', HTTP_AUTHORIZATION=f'Bearer {token}',
+    )
+    return ClaimsJWTAuthentication().authenticate(request)[0]
+
+
+@pytest.fixture
+def claims_auth(monkeypatch):
+    """Включает `AUTH_TOKEN_CLAIMS` для уже импортированных представлений."""
+    monkeypatch.setattr(
+        APIView, 'authentication_classes', [ClaimsJWTAuthentication],
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ClaimsAuthentication:
+
+    def test_01_no_user_query(self, admin):
+        token = get_access_token(admin)
+        authenticate(token)
+        with CaptureQueriesContext(connection) as context:
+            user = authenticate(token)
+            assert user.is_admin
+            assert user.username == admin.username
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что пользователь берётся из утверждений токена без '
+            'запроса к БД.'
+        )
+
+    def test_02_deferred_fields_loaded_at_once(self, admin):
+        user = authenticate(get_access_token(admin))
+        with CaptureQueriesContext(connection) as context:
+            assert user.bio == admin.bio
+            assert user.email == admin.email
+            assert user.first_name == admin.first_name
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что отложенные поля пользователя загружаются одним '
+            'запросом.'
+        )
+
+    def test_03_token_without_claims(self, user):
+        assert authenticate(AccessToken.for_user(user)).bio == user.bio
+
+    def test_04_role_change_revokes_token(
+        self, claims_auth, user_superuser_client, admin,
+    ):
+        client = claims_client(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        response = user_superuser_client.patch(
+            f'/api/v1/users/{admin.username}/', data={'role': 'user'},
+        )
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что после смены роли старый токен не принимается.'
+        )
+        admin.refresh_from_db()
+        assert claims_client(admin).get('/api/v1/users/').status_code == 403
+
+    def test_05_profile_update_with_claims(self, claims_auth, user):
+        client = claims_client(user)
+        response = client.patch(
+            '/api/v1/users/me/', data={'bio': 'new bio'}, format='json',
+        )
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'new bio'
+
+    def test_06_version_expires(self, admin, settings):
+        settings.AUTH_TOKEN_VERSION_TIMEOUT = 1
+        token = get_access_token(admin)
+        authenticate(token)
+        admin.role = 'user'
+        admin.token_version += 1
+        admin.save()
+        assert get_cache().get(token_version_key(admin.pk)) == (
+            admin.token_version
+        ), 'Проверьте, что при изменении пользователя версия записывается.'
+        set_token_version(admin.pk, admin.token_version - 1)
+        time.sleep(1.1)
+        assert get_token_version(admin.pk) == admin.token_version, (
+            'Проверьте, что версия токенов в кэше истекает через '
+            '`AUTH_TOKEN_VERSION_TIMEOUT` секунд, и процесс с устаревшим '
+            'кэшем перестаёт принимать отозванные токены.'
+        )
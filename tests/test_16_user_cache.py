@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import UserCache, user_cache
+from tests.test_09_queries import table_queries
+from tests.test_15_claims_auth import claims_auth, claims_client  # noqa
+
+
+def user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(table_queries(context, 'reviews_user'))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16UserCache:
+
+    def test_01_repeated_requests_skip_user_query(self, user_client):
+        assert user_queries(user_client, '/api/v1/titles/') == 1
+        assert user_queries(user_client, '/api/v1/titles/') == 0, (
+            'Проверьте, что пользователь повторного запроса берётся из кэша.'
+        )
+        assert user_cache.stats()['hit'] == 1
+
+    def test_02_user_change_invalidates(self, user, user_client):
+        user_queries(user_client, '/api/v1/titles/')
+        user.bio = 'new bio'
+        user.save()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'new bio', (
+            'Проверьте, что изменение пользователя удаляет его из кэша.'
+        )
+
+    def test_03_deleted_user_rejected(self, user, user_client):
+        user_queries(user_client, '/api/v1/titles/')
+        user.delete()
+        assert user_client.get('/api/v1/titles/').status_code == 401
+
+    def test_04_lru_and_timeout(self, admin, user, moderator):
+        cache = UserCache(maxsize=2, timeout=60)
+        for person in (admin, user, moderator):
+            cache.get(person.pk, lambda: person)
+        assert list(cache.entries) == [user.pk, moderator.pk]
+        expired = UserCache(maxsize=2, timeout=-1)
+        expired.get(user.pk, lambda: user)
+        expired.get(user.pk, lambda: user)
+        assert expired.stats() == {'hit': 0, 'miss': 2, 'size': 1}
+
+    def test_05_stats(self, admin_client):
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.json()['users']['miss'] == 1
+
+    def test_06_claims_user_fields_from_cache(self, claims_auth, user):
+        client = claims_client(user)
+        assert user_queries(client, '/api/v1/users/me/') == 1
+        assert user_queries(client, '/api/v1/users/me/') == 0, (
+            'Проверьте, что отложенные поля пользователя из утверждений '
+            'токена берутся из кэша.'
+        )
+        user.bio = 'new bio'
+        user.save()
+        assert client.get('/api/v1/users/me/').json()['bio'] == 'new bio'
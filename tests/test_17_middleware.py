@@ -0,0 +1,45 @@
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17PathScopedMiddleware:
+
+    def test_01_api_without_session_middleware(self, client):
+        response = client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert 'X-Frame-Options' not in response, (
+            'Проверьте, что middleware админки не выполняются для запросов '
+            'к API.'
+        )
+        assert 'Cookie' not in response.get('Vary', '')
+        assert not hasattr(response.wsgi_request, 'session')
+
+    def test_02_admin_keeps_middleware(self, client, user_superuser):
+        response = client.get('/admin/login/')
+        assert response.status_code == 200
+        assert response['X-Frame-Options'] == 'DENY'
+        assert 'csrftoken' in response.cookies
+        response = client.post(
+            '/admin/login/',
+            data={'username': user_superuser.username, 'password': '1234567'},
+        )
+        assert response.status_code == 302
+        assert client.get('/admin/').status_code == 200, (
+            'Проверьте, что вход в админку работает через сессии.'
+        )
+
+    def test_03_admin_csrf_enforced(self, user_superuser):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(
+            '/admin/login/',
+            data={'username': user_superuser.username, 'password': '1234567'},
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что CsrfViewMiddleware проверяет запросы к админке.'
+        )
+
+    def test_04_benchmark(self, capsys):
+        call_command('benchmiddleware', '--requests', '10')
+        assert 'Экономия' in capsys.readouterr().out
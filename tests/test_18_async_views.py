@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.base import BaseHandler
+from django.test import RequestFactory, override_settings
+
+from api.views import GenreCreateListDestroyViewSet, TitleViewSet
+from reviews.models import Genre
+from tests.test_09_queries import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AsyncViews:
+
+    def test_01_sync_by_default(self):
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert not asyncio.iscoroutinefunction(view)
+
+    @override_settings(ASYNC_CATALOG_VIEWS=True)
+    def test_02_read_in_thread_pool(self):
+        create_catalog(3)
+        view = TitleViewSet.as_view({'get': 'list', 'post': 'create'})
+        assert asyncio.iscoroutinefunction(view), (
+            'Проверьте, что при ASYNC_CATALOG_VIEWS представления каталога '
+            'асинхронные.'
+        )
+        threads = []
+        original = TitleViewSet.list
+
+        def list_titles(self, request, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return original(self, request, *args, **kwargs)
+
+        request = RequestFactory().get('/api/v1/titles/')
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(TitleViewSet, 'list', list_titles)
+            response = async_to_sync(view)(request)
+        assert response.status_code == 200
+        assert response.is_rendered
+        assert b'"count":3' in response.content
+        assert threads and threads[0] is not threading.main_thread()
+
+        response = async_to_sync(view)(
+            RequestFactory().post('/api/v1/titles/', data={})
+        )
+        assert response.status_code == 401
+
+    @override_settings(ASYNC_CATALOG_VIEWS=True)
+    def test_03_genres_list(self):
+        Genre.objects.create(name='Жанр', slug='genre')
+        view = GenreCreateListDestroyViewSet.as_view({'get': 'list'})
+        response = async_to_sync(view)(RequestFactory().get('/api/v1/genres/'))
+        assert response.status_code == 200
+        assert b'"slug":"genre"' in response.content
+
+    def test_04_middleware_async_mode(self, user_superuser):
+        handler = BaseHandler()
+        handler.load_middleware(is_async=True)
+        assert asyncio.iscoroutinefunction(handler._middleware_chain), (
+            'Проверьте, что цепочка middleware работает в асинхронном режиме.'
+        )
+        factory = RequestFactory()
+        response = async_to_sync(handler.get_response_async)(
+            factory.get('/api/v1/genres/')
+        )
+        assert response.status_code == 200
+        assert 'X-Frame-Options' not in response
+        response = async_to_sync(handler.get_response_async)(
+            factory.get('/admin/login/')
+        )
+        assert response.status_code == 200
+        assert response['X-Frame-Options'] == 'DENY'
@@ -0,0 +1,94 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.db import connections
+
+from api_yamdb.backends.sqlite3.base import DatabaseWrapper
+from api_yamdb.database import parse_database_url
+
+
+class Test19DatabaseUrl:
+
+    def test_01_sqlite(self):
+        config = parse_database_url('sqlite:///db.sqlite3', '/srv')
+        assert config['ENGINE'] == 'api_yamdb.backends.sqlite3'
+        assert config['NAME'] == Path('/srv/db.sqlite3')
+        assert config['PRAGMAS'] == {}
+        assert config['CONN_MAX_AGE'] == 0
+        absolute = parse_database_url('sqlite:////var/db.sqlite3', '/srv')
+        assert absolute['NAME'] == Path('/var/db.sqlite3')
+
+    def test_02_sqlite_wal(self):
+        config = parse_database_url(
+            'sqlite+wal:///db.sqlite3?mmap_size=0', '/srv',
+        )
+        assert config['PRAGMAS']['journal_mode'] == 'WAL'
+        assert config['PRAGMAS']['synchronous'] == 'NORMAL'
+        assert config['PRAGMAS']['mmap_size'] == '0'
+
+    def test_03_postgres(self):
+        config = parse_database_url(
+            'postgresql://yamdb:p%40ss@db/yamdb'
+            '?conn_max_age=600&sslmode=require',
+            '/srv',
+        )
+        assert config == {
+            'ENGINE': 'api_yamdb.backends.postgresql',
+            'NAME': 'yamdb',
+            'USER': 'yamdb',
+            'PASSWORD': 'p@ss',
+            'HOST': 'db',
+            'PORT': 5432,
+            'OPTIONS': {'sslmode': 'require'},
+            'CONN_MAX_AGE': 600,
+            'HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': False,
+        }
+
+    def test_04_pgbouncer(self):
+        config = parse_database_url('pgbouncer://yamdb@localhost/yamdb', '')
+        assert config['PORT'] == 6432
+        assert config['DISABLE_SERVER_SIDE_CURSORS'] is True
+
+    def test_05_unknown_scheme(self):
+        with pytest.raises(ValueError):
+            parse_database_url('mysql://localhost/yamdb', '')
+
+
+class Test19DatabaseBackends:
+
+    def test_01_wal_pragmas(self, tmp_path):
+        config = parse_database_url(
+            f'sqlite+wal:///{tmp_path / "db.sqlite3"}', '',
+        )
+        wrapper = DatabaseWrapper({**config, 'OPTIONS': {}})
+        sqlite = wrapper.get_new_connection(wrapper.get_connection_params())
+        pragmas = {
+            name: sqlite.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'mmap_size')
+        }
+        sqlite.close()
+        assert pragmas == {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'mmap_size': 256 * 1024 * 1024,
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_health_check_closes_broken_connection(self):
+        connection = connections['default']
+        connection.ensure_connection()
+        connection.close_at = None
+        with mock.patch.dict(
+            connection.settings_dict, HEALTH_CHECKS=True,
+        ), mock.patch.object(
+            DatabaseWrapper, 'is_usable', return_value=False,
+        ), mock.patch.object(DatabaseWrapper, 'close') as close:
+            connection.close_if_unusable_or_obsolete()
+            connection.ensure_connection()
+            connection.ensure_connection()
+        assert close.call_count == 1, (
+            'Проверьте, что непригодное соединение закрывается один раз '
+            'перед первым запросом.'
+        )
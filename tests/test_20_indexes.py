@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Indexes:
+
+    def test_01_no_full_scans(self, capsys):
+        call_command(
+            'explainqueries', '--titles', '2000', '--min-rows', '100',
+            verbosity=0,
+        )
+        assert 'Все запросы используют индексы' in capsys.readouterr().out
+        assert not Title.objects.exists(), (
+            'Проверьте, что тестовые данные удаляются после проверки.'
+        )
+
+    def test_02_full_scan_detected(self, capsys):
+        with pytest.raises(CommandError):
+            call_command(
+                'explainqueries', '--titles', '2000', '--min-rows', '1',
+                verbosity=0,
+            )
+        assert 'полный просмотр' in capsys.readouterr().out
+
+    def test_03_restricted_allowed_hosts(self, capsys, settings):
+        settings.ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+        call_command(
+            'explainqueries', '--titles', '2000', '--min-rows', '100',
+            verbosity=0,
+        )
+        assert 'Все запросы используют индексы' in capsys.readouterr().out, (
+            'Проверьте, что команда работает с `ALLOWED_HOSTS` из '
+            '`.env.example`.'
+        )
+
+    def test_04_filters_match_seeded_data(self, capsys):
+        call_command(
+            'explainqueries', '--titles', '2000', '--min-rows', '100',
+            verbosity=1,
+        )
+        out = capsys.readouterr().out
+        assert not any(
+            f'{url}: запросов 0' in out for url in (
+                '?category=category-1',
+                '?genre=genre-1,genre-2&genre_mode=all',
+                '?genre=genre-1,genre-2&category=category-1',
+            )
+        ), (
+            'Проверьте, что тестовые данные подходят под фильтры каждого '
+            'запроса и команде есть что проверять.'
+        )
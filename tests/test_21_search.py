@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Title
+
+URL = '/api/v1/titles/'
+
+
+def names(client, query):
+    response = client.get(URL, {'search': query})
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TitleSearch:
+
+    def test_01_ranked_by_relevance(self, client):
+        Title.objects.create(
+            name='Война и мир', year=1869, description='роман-эпопея',
+        )
+        Title.objects.create(
+            name='Тихий Дон', year=1940, description='роман о войне и мире',
+        )
+        Title.objects.create(name='Мир', year=2000, description='')
+        assert names(client, 'мир') == ['Мир', 'Война и мир', 'Тихий Дон'], (
+            'Проверьте, что поиск по `?search=` находит произведения по '
+            'словам названия и описания и ставит выше совпадения в названии.'
+        )
+        assert names(client, 'войн') == ['Война и мир', 'Тихий Дон'], (
+            'Проверьте, что последнее слово запроса ищется как префикс.'
+        )
+        assert names(client, 'эпопея') == ['Война и мир']
+        assert names(client, 'роман войне') == ['Тихий Дон']
+
+    def test_02_index_follows_changes(self, client):
+        title = Title.objects.create(name='Старое название', year=2000)
+        Title.objects.bulk_create([Title(name='Пакетная загрузка', year=2000)])
+        assert names(client, 'пакетная') == ['Пакетная загрузка']
+        title.name = 'Новое название'
+        title.save()
+        assert names(client, 'старое') == []
+        assert names(client, 'новое') == ['Новое название']
+        Title.objects.filter(pk=title.pk).update(description='описание')
+        assert names(client, 'описание') == ['Новое название']
+        title.delete()
+        assert names(client, 'новое') == [], (
+            'Проверьте, что удалённые произведения пропадают из поиска.'
+        )
+
+    def test_03_query_syntax_is_escaped(self, client):
+        Title.objects.create(name='AND OR NOT', year=2000)
+        assert names(client, 'not') == ['AND OR NOT']
+        assert names(client, '"*:(-') == []
+        assert names(client, 'and OR "') == ['AND OR NOT']
+
+    def test_04_combined_with_filters(self, client):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        drama = Title.objects.create(name='Гамлет драма', year=1600)
+        drama.genre.add(genre)
+        Title.objects.create(name='Гамлет пародия', year=2000)
+        response = client.get(URL, {'search': 'гамлет', 'genre': 'drama'})
+        assert [item['id'] for item in response.json()['results']] == [
+            drama.id
+        ]
+        response = client.get(URL, {'search': 'гамлет', 'cursor': ''})
+        assert len(response.json()['results']) == 2
+
+    def test_05_uses_full_text_index(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000)
+            for idx in range(200)
+        )
+        with CaptureQueriesContext(connection) as context:
+            names(client, 'произведение 150')
+        query = next(
+            query['sql'] for query in context.captured_queries
+            if 'reviews_title_fts' in query['sql']
+            and 'COUNT' not in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {query}')
+            plan = [row[-1] for row in cursor.fetchall()]
+        assert 'SCAN reviews_title' not in plan, (
+            'Проверьте, что поиск не просматривает всю таблицу произведений.'
+        )
+
+    def test_06_cursor_pages(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Матрица {idx}', year=1999, description=(
+                'матрица ' * (idx % 3)
+            ))
+            for idx in range(7)
+        )
+        Title.objects.create(name='Другое', year=2000)
+        expected = [
+            item['id'] for item in client.get(
+                URL, {'search': 'матрица', 'limit': 10},
+            ).json()['results']
+        ]
+        response = client.get(
+            URL, {'search': 'матрица', 'cursor': '', 'limit': 2},
+        )
+        pages = []
+        while True:
+            assert response.status_code == 200, (
+                'Проверьте, что следующие страницы поиска по курсору '
+                'открываются без ошибки.'
+            )
+            pages.append([item['id'] for item in response.json()['results']])
+            if not response.json()['next']:
+                break
+            response = client.get(response.json()['next'])
+        assert len(pages) == 4
+        assert sum(pages, []) == expected, (
+            'Проверьте, что обход результатов поиска по курсору возвращает '
+            'их в порядке релевантности без повторов и пропусков.'
+        )
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import bump_version
+from api.suggest import INDEXES
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/suggest/'
+
+
+def suggest(client, query, **params):
+    response = client.get(URL, {'q': query, **params})
+    assert response.status_code == 200, (
+        f'Проверьте, что `{URL}` доступен без авторизации.'
+    )
+    return response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Suggest:
+
+    def test_01_prefix_matches(self, client):
+        Title.objects.create(name='Война и мир', year=1869)
+        Title.objects.create(name='Мирный воин', year=2000)
+        Title.objects.create(name='Тихий Дон', year=1940)
+        Genre.objects.create(name='Военная драма', slug='war-drama')
+        Category.objects.create(name='Фильм', slug='movie')
+        data = suggest(client, 'ВО')
+        assert sorted(item['name'] for item in data['titles']) == [
+            'Война и мир', 'Мирный воин',
+        ], (
+            'Проверьте, что подсказки находят произведения по началу любого '
+            'слова в названии без учёта регистра.'
+        )
+        assert data['genres'] == [
+            {'name': 'Военная драма', 'slug': 'war-drama'},
+        ]
+        assert data['categories'] == []
+        assert suggest(client, 'ДРАМ')['genres'] == [
+            {'name': 'Военная драма', 'slug': 'war-drama'},
+        ]
+        assert suggest(client, 'фил')['categories'] == [
+            {'name': 'Фильм', 'slug': 'movie'},
+        ]
+        assert suggest(client, 'война и м')['titles'][0]['year'] == 1869
+
+    def test_02_limit_and_validation(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Серия {idx}', year=2000) for idx in range(20)
+        )
+        bump_version('suggest:titles')
+        assert len(suggest(client, 'серия', limit=5)['titles']) == 5
+        assert len(suggest(client, 'серия')['titles']) == 10
+        assert client.get(URL).status_code == 400
+        assert client.get(URL, {'q': 'x', 'limit': 0}).status_code == 400
+        assert client.get(URL, {'q': 'x', 'limit': 51}).status_code == 400
+
+    def test_03_no_queries_when_warm(self, client):
+        Title.objects.create(name='Гамлет', year=1600)
+        suggest(client, 'гам')
+        with CaptureQueriesContext(connection) as context:
+            data = suggest(client, 'гам')
+        assert data['titles'][0]['name'] == 'Гамлет'
+        assert not context.captured_queries, (
+            'Проверьте, что подсказки отвечают из памяти без запросов к БД.'
+        )
+
+    def test_04_incremental_updates(self, client):
+        title = Title.objects.create(name='Старое название', year=2000)
+        suggest(client, 'стар')
+        with CaptureQueriesContext(connection) as context:
+            title.name = 'Новое название'
+            title.save()
+            Genre.objects.create(name='Комедия', slug='comedy')
+            assert suggest(client, 'стар')['titles'] == []
+            assert suggest(client, 'нов')['titles'] == [
+                {'id': title.pk, 'name': 'Новое название', 'year': 2000},
+            ]
+            assert suggest(client, 'ком')['genres'][0]['slug'] == 'comedy'
+            title.delete()
+            assert suggest(client, 'нов')['titles'] == []
+        assert all(
+            query['sql'].split()[0] != 'SELECT'
+            or 'reviews_title"."name' not in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что изменения моделей обновляют индекс подсказок '
+            'точечно, без перестроения.'
+        )
+
+    def test_05_rebuilt_after_external_change(self, client):
+        suggest(client, 'пак')
+        Title.objects.bulk_create([Title(name='Пакетная загрузка', year=2000)])
+        assert suggest(client, 'пак')['titles'] == []
+        bump_version('suggest:titles')
+        assert suggest(client, 'пак')['titles'][0]['name'] == (
+            'Пакетная загрузка'
+        ), (
+            'Проверьте, что индекс перестраивается, когда версия в кэше '
+            'изменилась в другом процессе.'
+        )
+        assert INDEXES['titles'].version is not None
@@ -0,0 +1,163 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import bump_version
+from api.checks import check_local_cache
+from api.membership import from_bitmap, to_bitmap
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+
+
+def names(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200
+    return sorted(item['name'] for item in response.json()['results'])
+
+
+@pytest.fixture
+def catalog():
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    both = Title.objects.create(name='Трагикомедия', year=2000, category=movie)
+    both.genre.set([drama, comedy])
+    only_drama = Title.objects.create(name='Гамлет', year=1600, category=book)
+    only_drama.genre.add(drama)
+    only_comedy = Title.objects.create(name='Ревизор', year=1836)
+    comedy.titles.add(only_comedy)
+    return drama, comedy, movie, book
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23GenreFilter:
+
+    def test_01_bitmap_roundtrip(self):
+        ids = [1, 7, 8, 64, 1000]
+        assert from_bitmap(to_bitmap(ids)) == ids
+        assert from_bitmap(to_bitmap([])) == []
+
+    def test_02_multiple_genres(self, client, catalog):
+        assert names(client, genre='drama,comedy') == [
+            'Гамлет', 'Ревизор', 'Трагикомедия',
+        ], (
+            'Проверьте, что `genre` принимает несколько slug через запятую '
+            'и по умолчанию находит произведения хотя бы одного жанра.'
+        )
+        assert names(client, genre='drama,comedy', genre_mode='all') == [
+            'Трагикомедия',
+        ], (
+            'Проверьте, что `genre_mode=all` оставляет произведения, у '
+            'которых есть все указанные жанры.'
+        )
+        assert names(client, genre='drama') == ['Гамлет', 'Трагикомедия']
+        assert names(client, genre='drama,unknown', genre_mode='all') == []
+        assert names(client, genre='unknown') == []
+        response = client.get(URL, {'genre': 'drama', 'genre_mode': 'x'})
+        assert response.status_code == 400
+
+    def test_03_combined_with_category_and_year(self, client, catalog):
+        assert names(client, genre='drama', category='movie,book') == [
+            'Гамлет', 'Трагикомедия',
+        ]
+        assert names(client, genre='comedy', category='movie') == [
+            'Трагикомедия',
+        ]
+        assert names(client, genre='drama', category='book', year=2000) == []
+        assert names(client, category='movie') == ['Трагикомедия']
+
+    def test_04_no_genre_join(self, client, catalog):
+        names(client, genre='drama')
+        with CaptureQueriesContext(connection) as context:
+            names(client, genre='drama,comedy', genre_mode='all')
+        assert not any(
+            'reviews_title_genre' in query['sql']
+            and 'WHERE "reviews_title_genre"."title_id" IN' not in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что фильтр по жанрам использует индекс в памяти, '
+            'а не соединение с таблицей жанров произведений.'
+        )
+
+    def test_05_index_follows_changes(self, client, catalog):
+        drama, comedy, movie, book = catalog
+        assert names(client, genre='drama') == ['Гамлет', 'Трагикомедия']
+        hamlet = Title.objects.get(name='Гамлет')
+        hamlet.genre.remove(drama)
+        comedy.titles.add(hamlet)
+        assert names(client, genre='drama') == ['Трагикомедия']
+        assert names(client, genre='comedy', genre_mode='all') == [
+            'Гамлет', 'Ревизор', 'Трагикомедия',
+        ]
+        hamlet.category = movie
+        hamlet.save()
+        assert names(client, category='book') == []
+        assert names(client, category='movie') == ['Гамлет', 'Трагикомедия']
+        drama.slug = 'tragedy'
+        drama.save()
+        assert names(client, genre='tragedy') == ['Трагикомедия']
+        comedy.titles.clear()
+        assert names(client, genre='comedy') == []
+        Title.objects.get(name='Трагикомедия').delete()
+        assert names(client, genre='tragedy') == [], (
+            'Проверьте, что индекс жанров обновляется по сигналам моделей '
+            'и `m2m_changed`.'
+        )
+
+    def test_06_rebuilt_after_external_change(self, client, catalog):
+        drama = catalog[0]
+        assert names(client, genre='drama') == ['Гамлет', 'Трагикомедия']
+        Title.genre.through.objects.bulk_create([Title.genre.through(
+            title=Title.objects.get(name='Ревизор'), genre=drama,
+        )])
+        bump_version('membership', 'titles')
+        assert names(client, genre='drama') == [
+            'Гамлет', 'Ревизор', 'Трагикомедия',
+        ]
+
+    def test_07_database_fallback(self, client, catalog, settings):
+        settings.TITLE_FILTER_MAX_IDS = 0
+        assert names(client, genre='drama,comedy', genre_mode='all') == [
+            'Трагикомедия',
+        ]
+        assert names(client, genre='drama,comedy', category='book') == [
+            'Гамлет',
+        ], (
+            'Проверьте, что при большом числе совпадений фильтр работает '
+            'через БД с теми же результатами.'
+        )
+
+    def test_08_rebuilt_after_timeout(self, admin_client, catalog, settings):
+        settings.LOCAL_INDEX_TIMEOUT = 1
+        drama = catalog[0]
+        assert names(admin_client, genre='drama') == ['Гамлет', 'Трагикомедия']
+        Title.genre.through.objects.bulk_create([Title.genre.through(
+            title=Title.objects.get(name='Ревизор'), genre=drama,
+        )])
+        time.sleep(1.1)
+        assert names(admin_client, genre='drama') == [
+            'Гамлет', 'Ревизор', 'Трагикомедия',
+        ], (
+            'Проверьте, что индекс в памяти перестраивается через '
+            '`LOCAL_INDEX_TIMEOUT` секунд, даже если версия в кэше не '
+            'менялась.'
+        )
+
+    def test_09_local_cache_requires_timeouts(self, settings):
+        assert check_local_cache(None) == []
+        settings.LOCAL_INDEX_TIMEOUT = 0
+        assert [error.id for error in check_local_cache(None)] == [
+            'api.E002',
+        ], (
+            'Проверьте, что с кэшем в памяти процесса нельзя отключить '
+            'перестроение индексов.'
+        )
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/api_yamdb',
+        }}
+        assert check_local_cache(None) == []
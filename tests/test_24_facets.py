@@ -0,0 +1,113 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+
+URL = '/api/v1/titles/'
+
+
+def get_facets(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200
+    return response.json()['facets']
+
+
+@pytest.fixture
+def catalog():
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    titles = [
+        Title.objects.create(name='Гамлет', year=1603, category=book),
+        Title.objects.create(name='Ревизор', year=1836, category=book),
+        Title.objects.create(name='Трагикомедия', year=1995, category=movie),
+        Title.objects.create(name='Комедия', year=1999, category=movie),
+        Title.objects.create(name='Без категории', year=2001),
+    ]
+    titles[0].genre.add(drama)
+    titles[1].genre.add(comedy)
+    titles[2].genre.set([drama, comedy])
+    titles[3].genre.add(comedy)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Facets:
+
+    def test_01_counts(self, client, catalog):
+        facets = get_facets(client, facets='genre,category,year')
+        assert facets['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 3},
+            {'slug': 'drama', 'name': 'Драма', 'count': 2},
+        ], 'Проверьте количество произведений по жанрам в `facets`.'
+        assert facets['category'] == [
+            {'slug': 'book', 'name': 'Книга', 'count': 2},
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+        ]
+        assert facets['year'] == [
+            {'decade': 1600, 'count': 1},
+            {'decade': 1830, 'count': 1},
+            {'decade': 1990, 'count': 2},
+            {'decade': 2000, 'count': 1},
+        ], 'Проверьте, что годы группируются по десятилетиям.'
+
+    def test_02_follow_filters(self, client, catalog):
+        facets = get_facets(client, facets='category,year', genre='comedy')
+        assert set(facets) == {'category', 'year'}
+        assert facets['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+            {'slug': 'book', 'name': 'Книга', 'count': 1},
+        ], 'Проверьте, что фасеты считаются для текущих фильтров.'
+        assert get_facets(client, facets='genre', search='гамлет') == {
+            'genre': [{'slug': 'drama', 'name': 'Драма', 'count': 1}],
+        }
+        response = client.get(URL)
+        assert 'facets' not in response.json()
+
+    def test_03_single_query_and_cache(self, admin_client, catalog):
+        url = f'{URL}?facets=genre,category,year&year=1995'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == 200
+        facet_queries = [
+            query for query in context.captured_queries
+            if 'UNION ALL' in query['sql']
+        ]
+        assert len(facet_queries) == 1, (
+            'Проверьте, что все фасеты считаются одним запросом.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(f'{url}&limit=1')
+        assert not any(
+            'UNION ALL' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что фасеты кэшируются по набору фильтров без учёта '
+            'параметров страницы.'
+        )
+
+    def test_04_invalidated_on_changes(self, admin_client, user, catalog):
+        params = {'facets': 'year', 'year': 1995}
+        assert get_facets(admin_client, **params)['year'] == [
+            {'decade': 1990, 'count': 1},
+        ]
+        Title.objects.create(name='Новинка', year=1995)
+        assert get_facets(admin_client, **params)['year'] == [
+            {'decade': 1990, 'count': 2},
+        ], 'Проверьте, что кэш фасетов сбрасывается при изменении произведений.'
+        before = get_facets(admin_client, facets='genre')
+        Review.objects.create(
+            title=catalog[0], author=user, text='Отзыв', score=5,
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert get_facets(admin_client, facets='genre') == before
+        assert any(
+            'GROUP BY' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что кэш фасетов сбрасывается при изменении отзывов.'
+
+    def test_05_unknown_facet(self, client, catalog):
+        response = client.get(URL, {'facets': 'genre,author'})
+        assert response.status_code == 400
+        assert 'facets' in response.json()
+        assert client.get(URL, {'facets': ''}).status_code == 400
@@ -0,0 +1,69 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Genre, Review, Title, User
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb/static/data'
+MODELS = (Genre, Title, Title.genre.through, User, Review, Comment)
+
+
+def counts():
+    return [model.objects.count() for model in MODELS]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ImportCsv:
+
+    def test_01_parallel_streaming(self):
+        call_command('importcsv', workers=1, verbosity=0)
+        expected = counts()
+        for model in reversed(MODELS):
+            model.objects.all().delete()
+        call_command(
+            'importcsv', workers=3, chunk_size=2, queue_size=1, verbosity=0,
+        )
+        assert all(expected)
+        assert counts() == expected, (
+            'Проверьте, что параллельный импорт через ограниченные очереди '
+            'загружает все строки.'
+        )
+
+    def test_02_failure_does_not_hang(self, settings, tmp_path):
+        shutil.copytree(DATA_DIR, tmp_path / 'data')
+        titles = tmp_path / 'data' / 'titles.csv'
+        lines = titles.read_text(encoding='utf-8').splitlines()
+        lines[2] = lines[2].replace(',', ';')
+        titles.write_text('\n'.join(lines), encoding='utf-8')
+        settings.STATICFILES_DIRS = [tmp_path]
+        with pytest.raises(Exception):
+            call_command(
+                'importcsv', workers=4, chunk_size=1, queue_size=1,
+                verbosity=0,
+            )
+
+    def test_03_rating_after_failure_and_resume(self, settings, tmp_path):
+        shutil.copytree(DATA_DIR, tmp_path / 'data')
+        comments = tmp_path / 'data' / 'comments.csv'
+        original = comments.read_text(encoding='utf-8')
+        lines = original.splitlines()
+        lines[2] = lines[2].replace(',', ';')
+        comments.write_text('\n'.join(lines), encoding='utf-8')
+        settings.STATICFILES_DIRS = [tmp_path]
+        with pytest.raises(Exception):
+            call_command('importcsv', workers=1, verbosity=0)
+        assert Title.objects.filter(rating_count__gt=0).exists(), (
+            'Проверьте, что рейтинги пересчитываются, даже если импорт '
+            'прервался после загрузки отзывов.'
+        )
+        Title.objects.update(rating_sum=0, rating_count=0)
+        comments.write_text(original, encoding='utf-8')
+        call_command(
+            'importcsv', workers=1, resume_from='comments', verbosity=0,
+        )
+        assert Title.objects.filter(rating_count__gt=0).exists(), (
+            'Проверьте, что при продолжении импорта после отзывов рейтинги '
+            'пересчитываются.'
+        )